@@ -1,4 +0,0 @@
-import os
-import sys
-
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -5,11 +5,12 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
-from configuration import DB_URL
-from models import PortfolioModel
-from models import UserModel
+from api.configuration import DB_URL
+from api.models import PortfolioModel
+from api.models import StatsCounterModel
+from api.models import UserModel
 
-orm_models = [UserModel, PortfolioModel]
+orm_models = [UserModel, PortfolioModel, StatsCounterModel]
 
 config = context.config
 
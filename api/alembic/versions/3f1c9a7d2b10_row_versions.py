@@ -0,0 +1,48 @@
+"""row versions
+
+Revision ID: 3f1c9a7d2b10
+Revises: 6886a88de6b6
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c9a7d2b10"
+down_revision: Union[str, None] = "6886a88de6b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ("users", "portfolios"):
+        op.add_column(
+            table,
+            sa.Column(
+                "version",
+                sa.Integer(),
+                server_default=sa.text("1"),
+                nullable=False,
+            ),
+        )
+        op.add_column(
+            table,
+            sa.Column(
+                "updated_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.text("now()"),
+                nullable=False,
+            ),
+        )
+
+
+def downgrade() -> None:
+    for table in ("portfolios", "users"):
+        op.drop_column(table, "updated_at")
+        op.drop_column(table, "version")
@@ -0,0 +1,65 @@
+"""lookup indexes
+
+Revision ID: 8b2e4d6f1a37
+Revises: 3f1c9a7d2b10
+Create Date: 2026-10-18 11:02:13.524087
+
+"""
+
+from typing import Sequence
+from typing import Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8b2e4d6f1a37"
+down_revision: Union[str, None] = "3f1c9a7d2b10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Each index leads with its filter column and ends with the primary key, so
+# a filtered keyset page is a single index range scan in page order.
+INDEXES = {
+    "ix_portfolios_user_id": ("portfolios", ["user_id", "id"]),
+    "ix_portfolios_type": ("portfolios", ["type", "id"]),
+    "ix_users_plan": ("users", ["plan", "id"]),
+}
+
+
+def upgrade() -> None:
+    # Duplicates of the primary key indexes
+    op.drop_constraint("users_id_key", "users", type_="unique")
+    op.drop_constraint("portfolios_id_key", "portfolios", type_="unique")
+
+    # Built concurrently so writes are not blocked while the indexes build
+    with op.get_context().autocommit_block():
+        for name, (table, columns) in INDEXES.items():
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        op.create_index(
+            "users_email_key",
+            "users",
+            ["email"],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+    op.execute(
+        "ALTER TABLE users "
+        "ADD CONSTRAINT users_email_key UNIQUE USING INDEX users_email_key"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("users_email_key", "users", type_="unique")
+    for name, (table, _) in INDEXES.items():
+        op.drop_index(name, table_name=table)
+
+    op.create_unique_constraint("portfolios_id_key", "portfolios", ["id"])
+    op.create_unique_constraint("users_id_key", "users", ["id"])
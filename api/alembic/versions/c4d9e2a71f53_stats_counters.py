@@ -0,0 +1,249 @@
+"""stats counters
+
+Revision ID: c4d9e2a71f53
+Revises: 8b2e4d6f1a37
+Create Date: 2026-10-18 14:26:51.907312
+
+"""
+
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4d9e2a71f53"
+down_revision: Union[str, None] = "8b2e4d6f1a37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Add the summed deltas of a statement to the counters, in key order so
+# concurrent writers lock the counter rows in the same order.
+UPSERT_DELTAS = """
+    INSERT INTO stats_counters AS counters (dimension, key, count)
+    SELECT dimension, key, sum(count) FROM deltas
+    GROUP BY dimension, key
+    HAVING sum(count) <> 0
+    ORDER BY dimension, key
+    ON CONFLICT (dimension, key)
+    DO UPDATE SET count = counters.count + excluded.count
+"""
+
+# Statement-level triggers see the rows changed by a statement in the
+# new_rows and old_rows transition tables, and update the counters once per
+# statement with the net changes, as a signed delta per row. A user is
+# inserted and deleted without portfolios, the foreign key sees to it.
+USERS_CHANGED = f"""
+CREATE FUNCTION stats_users_changed() RETURNS trigger
+LANGUAGE plpgsql AS $function$
+DECLARE
+    changes text;
+BEGIN
+    changes := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT id, plan, 1 AS delta FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT id, plan, -1 AS delta FROM old_rows'
+        ELSE 'SELECT id, new_rows.plan, 1 AS delta
+              FROM new_rows JOIN old_rows USING (id)
+              WHERE new_rows.plan <> old_rows.plan
+              UNION ALL
+              SELECT id, old_rows.plan, -1
+              FROM new_rows JOIN old_rows USING (id)
+              WHERE new_rows.plan <> old_rows.plan'
+    END;
+
+    EXECUTE format($statement$
+        WITH changes AS (%s),
+        deltas AS (
+            SELECT 'plan' AS dimension, plan AS key, sum(delta) AS count
+            FROM changes
+            GROUP BY plan
+            UNION ALL
+            SELECT 'portfolios_per_user', '0', sum(delta)
+            FROM changes
+            UNION ALL
+            SELECT 'plan_type', changes.plan || ':' || portfolios.type,
+                sum(changes.delta)
+            FROM changes JOIN portfolios ON portfolios.user_id = changes.id
+            GROUP BY changes.plan, portfolios.type
+        )
+        {UPSERT_DELTAS}
+    $statement$, changes);
+
+    RETURN NULL;
+END;
+$function$
+"""
+
+# The portfolios per user distribution moves each user whose portfolio count
+# changed by delta from the bucket of its previous count to the one of its
+# current count. Writers of the portfolios of a user are serialized on the
+# user row, so each one counts the portfolios committed before it.
+PORTFOLIOS_CHANGED = f"""
+CREATE FUNCTION stats_portfolios_changed() RETURNS trigger
+LANGUAGE plpgsql AS $function$
+DECLARE
+    changes text;
+BEGIN
+    changes := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT user_id, type, 1 AS delta FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT user_id, type, -1 AS delta FROM old_rows'
+        ELSE 'SELECT new_rows.user_id, new_rows.type, 1 AS delta
+              FROM new_rows JOIN old_rows USING (id)
+              WHERE (new_rows.user_id, new_rows.type)
+                  <> (old_rows.user_id, old_rows.type)
+              UNION ALL
+              SELECT old_rows.user_id, old_rows.type, -1
+              FROM new_rows JOIN old_rows USING (id)
+              WHERE (new_rows.user_id, new_rows.type)
+                  <> (old_rows.user_id, old_rows.type)'
+    END;
+
+    EXECUTE format($statement$
+        WITH changes AS (%s)
+        SELECT 1 FROM users
+        WHERE id IN (SELECT user_id FROM changes)
+        ORDER BY id
+        FOR NO KEY UPDATE
+    $statement$, changes);
+
+    EXECUTE format($statement$
+        WITH changes AS (%s),
+        per_user AS (
+            SELECT user_id, sum(delta) AS delta
+            FROM changes
+            GROUP BY user_id
+            HAVING sum(delta) <> 0
+        ),
+        counts AS (
+            SELECT delta, (
+                SELECT count(*) FROM portfolios
+                WHERE portfolios.user_id = per_user.user_id
+            ) AS current
+            FROM per_user
+        ),
+        deltas AS (
+            SELECT 'type' AS dimension, type AS key, sum(delta) AS count
+            FROM changes
+            GROUP BY type
+            UNION ALL
+            SELECT 'plan_type', users.plan || ':' || changes.type,
+                sum(changes.delta)
+            FROM changes JOIN users ON users.id = changes.user_id
+            GROUP BY users.plan, changes.type
+            UNION ALL
+            SELECT 'portfolios_per_user', (current - delta)::text, -count(*)
+            FROM counts
+            GROUP BY current - delta
+            UNION ALL
+            SELECT 'portfolios_per_user', current::text, count(*)
+            FROM counts
+            GROUP BY current
+        )
+        {UPSERT_DELTAS}
+    $statement$, changes);
+
+    RETURN NULL;
+END;
+$function$
+"""
+
+# TRUNCATE fires no delete triggers. Truncating users truncates portfolios
+# too, the foreign key sees to it.
+TRUNCATED = """
+CREATE FUNCTION stats_truncated() RETURNS trigger
+LANGUAGE plpgsql AS $function$
+BEGIN
+    IF TG_TABLE_NAME = 'users' THEN
+        DELETE FROM stats_counters;
+    ELSE
+        DELETE FROM stats_counters
+        WHERE dimension IN ('type', 'plan_type', 'portfolios_per_user');
+        INSERT INTO stats_counters (dimension, key, count)
+        SELECT 'portfolios_per_user', '0', count(*) FROM users
+        HAVING count(*) > 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$function$
+"""
+
+BACKFILL = """
+INSERT INTO stats_counters (dimension, key, count)
+SELECT 'plan', plan, count(*) FROM users GROUP BY plan
+UNION ALL
+SELECT 'type', type, count(*) FROM portfolios GROUP BY type
+UNION ALL
+SELECT 'plan_type', users.plan || ':' || portfolios.type, count(*)
+FROM portfolios JOIN users ON users.id = portfolios.user_id
+GROUP BY users.plan, portfolios.type
+UNION ALL
+SELECT 'portfolios_per_user', portfolios::text, count(*)
+FROM (
+    SELECT count(portfolios.id) AS portfolios
+    FROM users LEFT JOIN portfolios ON portfolios.user_id = users.id
+    GROUP BY users.id
+) AS per_user
+GROUP BY portfolios
+"""
+
+TABLES = {
+    "users": "stats_users_changed",
+    "portfolios": "stats_portfolios_changed",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stats_counters",
+        sa.Column("dimension", sa.VARCHAR(length=32), nullable=False),
+        sa.Column("key", sa.VARCHAR(length=64), nullable=False),
+        sa.Column(
+            "count",
+            sa.BigInteger(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("dimension", "key"),
+    )
+    op.execute(USERS_CHANGED)
+    op.execute(PORTFOLIOS_CHANGED)
+    op.execute(TRUNCATED)
+
+    # Creating the triggers blocks writes to the tables until the backfill
+    # commits, so no change is counted twice or missed
+    for table, function in TABLES.items():
+        op.execute(
+            f"CREATE TRIGGER stats_{table}_inserted AFTER INSERT ON {table} "
+            "REFERENCING NEW TABLE AS new_rows "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+        )
+        op.execute(
+            f"CREATE TRIGGER stats_{table}_updated AFTER UPDATE ON {table} "
+            "REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+        )
+        op.execute(
+            f"CREATE TRIGGER stats_{table}_deleted AFTER DELETE ON {table} "
+            "REFERENCING OLD TABLE AS old_rows "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+        )
+        op.execute(
+            f"CREATE TRIGGER stats_{table}_truncated AFTER TRUNCATE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION stats_truncated()"
+        )
+
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        for event in ("inserted", "updated", "deleted", "truncated"):
+            op.execute(f"DROP TRIGGER stats_{table}_{event} ON {table}")
+
+    for function in (*TABLES.values(), "stats_truncated"):
+        op.execute(f"DROP FUNCTION {function}()")
+
+    op.drop_table("stats_counters")
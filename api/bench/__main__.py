@@ -0,0 +1,119 @@
+"""
+Load test the API and report latency percentiles, throughput and errors as
+JSON, e.g.:
+
+    python -m api.bench --scenario mixed --concurrency 50 --duration 30
+    python -m api.bench --url http://127.0.0.1:8000 --output head.json
+    python -m api.bench --compare head.json
+
+Without --url the app is served in-process through an ASGI transport, so
+the results measure the app and the database, not the HTTP server. The app
+still starts and stops through its lifespan, pools warm-up included.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+from contextlib import asynccontextmanager
+from typing import Any
+from typing import AsyncGenerator
+
+import httpx
+
+from api.bench.harness import State
+from api.bench.harness import app_client
+from api.bench.harness import compare
+from api.bench.harness import run
+from api.bench.scenarios import SCENARIOS
+from api.bench.scenarios import cleanup
+from api.bench.scenarios import prepare
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m api.bench")
+    parser.add_argument(
+        "--scenario", choices=sorted(SCENARIOS), default="mixed"
+    )
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument(
+        "--url", help="Target a running server instead of the in-process app"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this file")
+    parser.add_argument(
+        "--compare", help="Results file of a previous run to compare against"
+    )
+    return parser.parse_args()
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@asynccontextmanager
+async def client_factory(
+    url: str | None, concurrency: int
+) -> AsyncGenerator[httpx.AsyncClient, None]:
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    if url is not None:
+        async with httpx.AsyncClient(
+            base_url=url, limits=limits, timeout=60
+        ) as client:
+            yield client
+        return
+
+    async with app_client(limits=limits, timeout=60) as client:
+        yield client
+
+
+async def main(args: argparse.Namespace) -> dict[str, Any]:
+    state = State(rng=random.Random(args.seed))
+
+    async with client_factory(args.url, args.concurrency) as client:
+        await prepare(client, state)
+        try:
+            results = await run(
+                client,
+                SCENARIOS[args.scenario],
+                state,
+                concurrency=args.concurrency,
+                duration=args.duration,
+                warmup=args.warmup,
+            )
+        finally:
+            await cleanup(client, state)
+
+    results["commit"] = current_commit()
+    results["target"] = args.url or "asgi"
+    return results
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            results["comparison"] = compare(json.load(file), results)
+
+    output = json.dumps(results, indent=2)
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            file.write(output)
+
+    sys.stdout.write(output + "\n")
@@ -0,0 +1,76 @@
+"""
+Check that coalesced reads keep their Server-Timing, on the in-process app
+with the entity cache disabled so every GET reaches the database:
+
+    python -m api.bench.coalescing --concurrency 20
+
+Sends concurrent identical GET /users/{id} and GET /users requests and
+exits with status 1 unless every response reports the queries it shared in
+a db-coalesced Server-Timing entry.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from typing import Any
+
+import httpx
+
+from api.bench.harness import app_client
+
+COALESCED = re.compile(r'db-coalesced;dur=([\d.]+);desc="(\d+) queries"')
+
+
+async def timings(
+    client: httpx.AsyncClient, path: str, concurrency: int
+) -> list[str | None]:
+    responses = await asyncio.gather(
+        *[client.get(path) for _ in range(concurrency)]
+    )
+    return [
+        response.raise_for_status().headers.get("Server-Timing")
+        for response in responses
+    ]
+
+
+async def main(args: argparse.Namespace) -> dict[str, Any]:
+    # Before the app is imported, so every GET reaches the database
+    os.environ["CACHE_BACKEND"] = ""
+    async with app_client() as client:
+        users = (await client.get("/users?limit=1")).raise_for_status()
+        items = users.json()["items"]
+        if not items:
+            raise RuntimeError("The database needs at least a user")
+
+        results = {}
+        for path in (f"/users/{items[0]['id']}", "/users"):
+            headers = await timings(client, path, args.concurrency)
+            matches = [
+                None if header is None else COALESCED.search(header)
+                for header in headers
+            ]
+            results[path] = {
+                "responses": len(headers),
+                "with_server_timing": sum(h is not None for h in headers),
+                "with_coalesced_queries": sum(
+                    match is not None and int(match.group(2)) > 0
+                    for match in matches
+                ),
+            }
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m api.bench.coalescing")
+    parser.add_argument("--concurrency", type=int, default=20)
+    results = asyncio.run(main(parser.parse_args()))
+    sys.stdout.write(json.dumps(results, indent=2) + "\n")
+    if any(
+        result["with_coalesced_queries"] != result["responses"]
+        for result in results.values()
+    ):
+        sys.exit(1)
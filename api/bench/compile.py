@@ -0,0 +1,97 @@
+"""
+Measure the per-execution statement overhead of the hot lookups, without
+a database:
+
+    python -m api.bench.compile --iterations 5000
+
+"built" constructs the statement for each execution, as the repositories
+did before their statements were prebuilt, and so regenerates its cache
+key. "prebuilt" reuses the statement of the repository, whose cache key is
+memoized. "compile" is the cost the engine compiled cache saves on each
+hit, for reference. Times are in microseconds per execution.
+"""
+
+import argparse
+import json
+import sys
+import timeit
+import uuid
+from typing import Any
+from typing import Callable
+
+from sqlalchemy.dialects import postgresql
+from sqlmodel import col
+
+from api.models.portfolio import PortfolioModel
+from api.models.user import UserModel
+from api.repositories.base import Select
+from api.repositories.pagination import decode_cursor
+from api.repositories.pagination import encode_cursor
+from api.repositories.user import UserRepository
+
+dialect = postgresql.asyncpg.dialect()
+
+
+def built_get() -> Select:
+    return UserRepository.select(UserModel).where(
+        col(UserModel.id) == uuid.uuid4()
+    )
+
+
+def built_all() -> Select:
+    cursor = encode_cursor(uuid.uuid4())
+    return (
+        UserRepository.select(UserModel.__table__)
+        .where(col(UserModel.plan) == "gold")
+        .where(col(UserModel.id) > decode_cursor(cursor))
+        .order_by(col(UserModel.id))
+        .limit(101)
+    )
+
+
+def built_get_portfolios() -> Select:
+    return UserRepository.select(PortfolioModel).where(
+        col(PortfolioModel.user_id) == uuid.uuid4()
+    )
+
+
+def prebuilt_all() -> Select:
+    cursor = encode_cursor(uuid.uuid4())
+    names, _ = UserRepository.page_params(101, cursor, plan="gold")
+    return UserRepository.rows_page_statement(None, names)
+
+
+STATEMENTS: dict[str, tuple[Callable[[], Select], Callable[[], Select]]] = {
+    "get": (built_get, UserRepository.get_statement),
+    "all": (built_all, prebuilt_all),
+    "get_portfolios": (
+        built_get_portfolios,
+        UserRepository.portfolios_statement,
+    ),
+}
+
+
+def per_call(func: Callable[[], Any], iterations: int) -> float:
+    return round(timeit.timeit(func, number=iterations) / iterations * 1e6, 2)
+
+
+def measure(name: str, iterations: int) -> dict[str, float]:
+    built, prebuilt = STATEMENTS[name]
+    return {
+        "built_us": per_call(lambda: built()._generate_cache_key(), iterations),
+        "prebuilt_us": per_call(
+            lambda: prebuilt()._generate_cache_key(), iterations
+        ),
+        "compile_us": per_call(
+            lambda: built().compile(dialect=dialect), iterations // 10 or 1
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m api.bench.compile")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    results = {name: measure(name, args.iterations) for name in STATEMENTS}
+    sys.stdout.write(json.dumps(results, indent=2) + "\n")
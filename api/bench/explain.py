@@ -0,0 +1,141 @@
+"""
+Check that the hot queries keep using indexes on a large dataset:
+
+    python -m api.bench.explain --users 100000
+
+Seeds users and portfolios in a transaction, analyzes them, and runs
+EXPLAIN on the prebuilt repository statements. Exits with status 1 when a
+plan sequentially scans users or portfolios. The transaction is rolled
+back, so the database is left as it was.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from api.enums.portfolio_type import PortfolioType
+from api.enums.subscription_plan import SubscriptionPlan
+from api.repositories.base import Select
+from api.repositories.base import get_engine
+from api.repositories.portfolio import PortfolioRepository
+from api.repositories.user import UserRepository
+
+TABLES = {"users", "portfolios"}
+
+SEED = """
+INSERT INTO users (id, name, surname, email, plan)
+SELECT
+    gen_random_uuid(),
+    'name-' || n,
+    'surname-' || n,
+    'explain-' || n || '@example.com',
+    (ARRAY['freemium', 'premium', 'gold', 'ultra'])[1 + n % 4]
+FROM generate_series(1, :users) AS n;
+
+INSERT INTO portfolios (type, user_id)
+SELECT (ARRAY['stock', 'etf', 'crypto'])[1 + n % 3], users.id
+FROM users, generate_series(1, :per_user) AS n;
+
+ANALYZE users;
+ANALYZE portfolios;
+"""
+
+
+def hot_queries(user_id: uuid.UUID) -> dict[str, tuple[Select, dict]]:
+    cursor = uuid.UUID(int=2**127)
+    return {
+        "users.get": (UserRepository.get_statement(), {"id": user_id}),
+        "users.page": (
+            UserRepository.rows_page_statement(None, ("cursor",)),
+            {"cursor": cursor, "limit": 101},
+        ),
+        "users.page?plan": (
+            UserRepository.rows_page_statement(None, ("cursor", "plan")),
+            {"cursor": cursor, "plan": SubscriptionPlan.GOLD, "limit": 101},
+        ),
+        "users.portfolios": (
+            UserRepository.portfolios_statement(),
+            {"id": user_id},
+        ),
+        "users.page?include=portfolios": (
+            UserRepository.portfolios_page_statement(("cursor",), None),
+            {"cursor": cursor, "limit": 101},
+        ),
+        "portfolios.page?type": (
+            PortfolioRepository.rows_page_statement(None, ("cursor", "type")),
+            {"cursor": cursor, "type": PortfolioType.ETF, "limit": 101},
+        ),
+        "portfolios.page?user_id": (
+            PortfolioRepository.rows_page_statement(None, ("user_id",)),
+            {"user_id": user_id, "limit": 101},
+        ),
+    }
+
+
+def seq_scans(plan: dict[str, Any]) -> list[str]:
+    scans = []
+    if plan["Node Type"] == "Seq Scan" and plan["Relation Name"] in TABLES:
+        scans.append(plan["Relation Name"])
+
+    for child in plan.get("Plans", []):
+        scans.extend(seq_scans(child))
+
+    return scans
+
+
+async def explain(
+    connection: AsyncConnection, statement: Select, params: dict
+) -> dict[str, Any]:
+    sql = statement.params(**params).compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    result = await connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+    return result.scalar_one()[0]["Plan"]
+
+
+async def main(args: argparse.Namespace) -> dict[str, Any]:
+    results = {}
+    engine = get_engine()
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            for sql in SEED.split(";"):
+                if sql.strip():
+                    await connection.execute(
+                        text(sql),
+                        {"users": args.users, "per_user": args.per_user},
+                    )
+
+            user_id = (
+                await connection.execute(text("SELECT id FROM users LIMIT 1"))
+            ).scalar_one()
+            for name, (statement, params) in hot_queries(user_id).items():
+                plan = await explain(connection, statement, params)
+                results[name] = {
+                    "plan": plan["Node Type"],
+                    "cost": plan["Total Cost"],
+                    "seq_scans": seq_scans(plan),
+                }
+        finally:
+            await transaction.rollback()
+
+    await engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m api.bench.explain")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--per-user", type=int, default=3)
+    results = asyncio.run(main(parser.parse_args()))
+
+    sys.stdout.write(json.dumps(results, indent=2) + "\n")
+    if any(result["seq_scans"] for result in results.values()):
+        sys.exit(1)
@@ -0,0 +1,100 @@
+"""
+Compare the list endpoint formats on the same page of users, best run on a
+large seeded dataset, see api.seed:
+
+    python -m api.bench.formats --limit 1000 --iterations 50
+
+"render" is the server side encoding of the fetched row mappings, "parse"
+the client side decoding of the body: with orjson for JSON, into a table for
+Arrow, with ormsgpack for msgpack. Times are in milliseconds per page.
+Requires the formats extra: poetry install -E formats
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from statistics import mean
+from typing import Any
+from typing import Callable
+
+import orjson
+import ormsgpack
+import pyarrow as pa
+
+from api.endpoints.formats import ARROW_STREAM
+from api.endpoints.formats import JSON
+from api.endpoints.formats import MSGPACK
+from api.endpoints.formats import page_response
+from api.models.user import UserModel
+from api.repositories.base import SessionManager
+from api.repositories.base import db_context
+from api.repositories.user import UserRepository
+
+PARSERS: dict[str, Callable[[bytes], Any]] = {
+    JSON: orjson.loads,
+    ARROW_STREAM: lambda body: pa.ipc.open_stream(body).read_all(),
+    MSGPACK: ormsgpack.unpackb,
+}
+
+
+async def fetch(limit: int) -> tuple[dict[str, Any], float]:
+    db = SessionManager()
+    token = db_context.set(db)
+    try:
+        start = time.perf_counter()
+        page = await UserRepository.page_rows(limit)
+        return page, (time.perf_counter() - start) * 1000
+    finally:
+        db_context.reset(token)
+        await db.close()
+
+
+def measure(
+    page: dict[str, Any], media_type: str, iterations: int
+) -> dict[str, Any]:
+    render_times, parse_times = [], []
+    body = b""
+    for _ in range(iterations):
+        start = time.perf_counter()
+        body = page_response(page, media_type, UserModel.__table__).body
+        rendered = time.perf_counter()
+        PARSERS[media_type](body)
+        parsed = time.perf_counter()
+
+        render_times.append((rendered - start) * 1000)
+        parse_times.append((parsed - rendered) * 1000)
+
+    return {
+        "render_ms": round(mean(render_times), 3),
+        "parse_ms": round(mean(parse_times), 3),
+        "total_ms": round(mean(render_times) + mean(parse_times), 3),
+        "bytes": len(body),
+    }
+
+
+async def main(args: argparse.Namespace) -> dict[str, Any]:
+    page, fetch_ms = await fetch(args.limit)
+    results: dict[str, Any] = {
+        "rows": len(page["items"]),
+        "fetch_ms": round(fetch_ms, 3),
+    }
+    for media_type in PARSERS:
+        measure(page, media_type, 1)
+        results[media_type] = measure(page, media_type, args.iterations)
+
+    for media_type in (ARROW_STREAM, MSGPACK):
+        results[media_type]["speedup"] = round(
+            results[JSON]["total_ms"] / results[media_type]["total_ms"], 2
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m api.bench.formats")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=50)
+    results = asyncio.run(main(parser.parse_args()))
+    sys.stdout.write(json.dumps(results, indent=2) + "\n")
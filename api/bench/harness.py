@@ -0,0 +1,213 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import AsyncGenerator
+from typing import Awaitable
+from typing import Callable
+
+import httpx
+
+Operation = Callable[[httpx.AsyncClient, "State"], Awaitable[httpx.Response]]
+
+
+@asynccontextmanager
+async def app_client(**kwargs: Any) -> AsyncGenerator[httpx.AsyncClient, None]:
+    """
+    A client of the app served in-process through an ASGI transport. The
+    app runs its lifespan as under a server, so the pools are warmed up,
+    the background workers run and the engines are disposed at exit.
+
+    **kwargs: Any, Arguments of httpx.AsyncClient.
+    """
+    from api.main import create_app
+
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://bench",
+            **kwargs,
+        ) as client:
+            yield client
+
+
+@dataclass
+class State:
+    """
+    Ids shared by the operations of a run: sampled from the API before the
+    run, plus the rows created by write operations.
+    """
+
+    rng: random.Random
+    user_ids: list[str] = field(default_factory=list)
+    portfolio_ids: list[str] = field(default_factory=list)
+    created_user_ids: list[str] = field(default_factory=list)
+    created_portfolio_ids: list[str] = field(default_factory=list)
+
+    def user_id(self) -> str:
+        return self.rng.choice(self.user_ids)
+
+    def portfolio_id(self) -> str:
+        return self.rng.choice(self.portfolio_ids)
+
+
+@dataclass
+class Scenario:
+    name: str
+    operations: dict[str, tuple[float, Operation]]
+
+    def pick(self, rng: random.Random) -> tuple[str, Operation]:
+        names = list(self.operations)
+        weights = [self.operations[name][0] for name in names]
+        name = rng.choices(names, weights)[0]
+        return name, self.operations[name][1]
+
+
+@dataclass
+class Recorder:
+    latencies: dict[str, list[float]] = field(
+        default_factory=lambda: defaultdict(list)
+    )
+    statuses: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+
+    def record(
+        self, name: str, elapsed: float, response: httpx.Response | None
+    ) -> None:
+        self.latencies[name].append(elapsed)
+        if response is None:
+            return
+
+        self.statuses[str(response.status_code)] += 1
+        if response.is_error:
+            self.errors[f"{name}: HTTP {response.status_code}"] += 1
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Nearest-rank percentile of values, q in [0, 100].
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = max(int(round(q / 100 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def latency_summary(values: list[float]) -> dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50) * 1000, 3),
+        "p95": round(percentile(values, 95) * 1000, 3),
+        "p99": round(percentile(values, 99) * 1000, 3),
+        "mean": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "max": round(max(values, default=0.0) * 1000, 3),
+    }
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    state: State,
+    recorder: Recorder | None,
+    deadline: float,
+) -> None:
+    while time.perf_counter() < deadline:
+        name, operation = scenario.pick(state.rng)
+        start = time.perf_counter()
+        try:
+            response = await operation(client, state)
+        except (httpx.HTTPError, LookupError) as exp:
+            if recorder is not None:
+                recorder.latencies[name].append(time.perf_counter() - start)
+                recorder.errors[f"{name}: {type(exp).__name__}"] += 1
+            continue
+
+        if recorder is not None:
+            recorder.record(name, time.perf_counter() - start, response)
+
+
+async def run(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    state: State,
+    concurrency: int,
+    duration: float,
+    warmup: float = 0.0,
+) -> dict[str, Any]:
+    """
+    Run the scenario with concurrency workers for duration seconds, after
+    an unrecorded warm-up of warmup seconds, and summarize the results.
+    """
+    if warmup > 0:
+        deadline = time.perf_counter() + warmup
+        await asyncio.gather(
+            *[
+                _worker(client, scenario, state, None, deadline)
+                for _ in range(concurrency)
+            ]
+        )
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(
+        *[
+            _worker(client, scenario, state, recorder, deadline)
+            for _ in range(concurrency)
+        ]
+    )
+    elapsed = time.perf_counter() - start
+
+    latencies = [
+        value for values in recorder.latencies.values() for value in values
+    ]
+    return {
+        "scenario": scenario.name,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": latency_summary(latencies),
+        "operations": {
+            name: {
+                "requests": len(values),
+                "latency_ms": latency_summary(values),
+            }
+            for name, values in sorted(recorder.latencies.items())
+        },
+        "statuses": dict(recorder.statuses),
+        "errors": dict(recorder.errors),
+    }
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    Relative change, in percent, of throughput and latency percentiles of
+    current against baseline.
+    """
+
+    def change(before: float, after: float) -> float | None:
+        if not before:
+            return None
+        return round((after - before) / before * 100, 2)
+
+    return {
+        "baseline_commit": baseline.get("commit"),
+        "current_commit": current.get("commit"),
+        "throughput_rps_pct": change(
+            baseline["throughput_rps"], current["throughput_rps"]
+        ),
+        "latency_ms_pct": {
+            key: change(baseline["latency_ms"][key], current["latency_ms"][key])
+            for key in ("p50", "p95", "p99")
+        },
+    }
@@ -0,0 +1,95 @@
+"""
+Check the import cost of the app against a budget, as every new worker pays
+it before serving its first request:
+
+    python -m api.bench.importtime --budget 1500
+
+Imports the module in a fresh interpreter with python -X importtime, minus
+the cost of the interpreter startup alone, and keeps the fastest of --runs
+runs so a busy machine does not fail the check. Exits with status 1 when
+over the budget, in milliseconds. The modules with the highest self time
+point at what to import lazily.
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+# The repository root, from which the api package is importable
+ROOT = Path(__file__).resolve().parents[2]
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(code: str) -> list[tuple[str, int, int, int]]:
+    """
+    The (module, depth, self, cumulative) times in microseconds of the
+    modules imported by a fresh interpreter running code.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    times = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match is not None:
+            self_us, cumulative_us, indent, module = match.groups()
+            depth = len(indent) // 2
+            times.append((module, depth, int(self_us), int(cumulative_us)))
+
+    return times
+
+
+def total_ms(times: list[tuple[str, int, int, int]]) -> float:
+    return (
+        sum(cumulative for _, depth, _, cumulative in times if depth == 0)
+        / 1000
+    )
+
+
+def measure(module: str, top: int) -> dict[str, Any]:
+    startup = total_ms(import_times("pass"))
+    times = import_times(f"import {module}")
+    slowest = sorted(times, key=lambda time: time[2], reverse=True)[:top]
+
+    return {
+        "import_ms": round(total_ms(times) - startup, 1),
+        "modules": len(times),
+        "slowest_self_ms": {
+            name: round(us / 1000, 1) for name, _, us, _ in slowest
+        },
+    }
+
+
+def main(args: argparse.Namespace) -> dict[str, Any]:
+    runs = [measure(args.module, args.top) for _ in range(args.runs)]
+    best = min(runs, key=lambda run: run["import_ms"])
+
+    return {
+        "module": args.module,
+        "budget_ms": args.budget,
+        "runs_ms": [run["import_ms"] for run in runs],
+        **best,
+        "over_budget": best["import_ms"] > args.budget,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m api.bench.importtime")
+    parser.add_argument("--module", default="api.main")
+    parser.add_argument("--budget", type=float, default=1500.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    results = main(parser.parse_args())
+    sys.stdout.write(json.dumps(results, indent=2) + "\n")
+    if results["over_budget"]:
+        sys.exit(1)
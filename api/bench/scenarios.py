@@ -0,0 +1,164 @@
+import httpx
+
+from api.bench.harness import Operation
+from api.bench.harness import Scenario
+from api.bench.harness import State
+from api.enums.portfolio_type import PortfolioType
+from api.enums.subscription_plan import SubscriptionPlan
+
+
+async def list_users(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    return await client.get("/users")
+
+
+async def get_user(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    return await client.get(f"/users/{state.user_id()}")
+
+
+async def get_user_portfolios(
+    client: httpx.AsyncClient, state: State
+) -> httpx.Response:
+    return await client.get(f"/users/{state.user_id()}/portfolios")
+
+
+async def list_portfolios(
+    client: httpx.AsyncClient, state: State
+) -> httpx.Response:
+    return await client.get("/portfolios")
+
+
+async def get_portfolio(
+    client: httpx.AsyncClient, state: State
+) -> httpx.Response:
+    return await client.get(f"/portfolios/{state.portfolio_id()}")
+
+
+async def create_user(
+    client: httpx.AsyncClient, state: State
+) -> httpx.Response:
+    n = state.rng.randrange(10**9)
+    response = await client.post(
+        "/users",
+        json={
+            "name": f"bench-{n}",
+            "surname": "bench",
+            "email": f"bench-{n}@example.com",
+            "plan": state.rng.choice(list(SubscriptionPlan)).value,
+        },
+    )
+    if response.is_success:
+        state.created_user_ids.append(response.json()["id"])
+
+    return response
+
+
+async def update_user(
+    client: httpx.AsyncClient, state: State
+) -> httpx.Response:
+    user_id = state.rng.choice(state.created_user_ids or state.user_ids)
+    return await client.put(
+        f"/users/{user_id}",
+        json={"plan": state.rng.choice(list(SubscriptionPlan)).value},
+    )
+
+
+async def create_portfolio(
+    client: httpx.AsyncClient, state: State
+) -> httpx.Response:
+    response = await client.post(
+        "/portfolios",
+        json={
+            "type": state.rng.choice(list(PortfolioType)).value,
+            "user_id": state.user_id(),
+        },
+    )
+    if response.is_success:
+        state.created_portfolio_ids.append(response.json()["id"])
+
+    return response
+
+
+async def update_portfolio(
+    client: httpx.AsyncClient, state: State
+) -> httpx.Response:
+    portfolio_id = state.rng.choice(
+        state.created_portfolio_ids or state.portfolio_ids
+    )
+    return await client.put(
+        f"/portfolios/{portfolio_id}",
+        json={"type": state.rng.choice(list(PortfolioType)).value},
+    )
+
+
+async def delete_portfolio(
+    client: httpx.AsyncClient, state: State
+) -> httpx.Response:
+    if not state.created_portfolio_ids:
+        return await create_portfolio(client, state)
+
+    portfolio_id = state.created_portfolio_ids.pop(
+        state.rng.randrange(len(state.created_portfolio_ids))
+    )
+    return await client.delete(f"/portfolios/{portfolio_id}")
+
+
+READS: dict[str, tuple[float, Operation]] = {
+    "GET /users": (1, list_users),
+    "GET /users/{id}": (1, get_user),
+    "GET /users/{id}/portfolios": (1, get_user_portfolios),
+    "GET /portfolios": (1, list_portfolios),
+    "GET /portfolios/{id}": (1, get_portfolio),
+}
+
+WRITES: dict[str, tuple[float, Operation]] = {
+    "POST /users": (1, create_user),
+    "PUT /users/{id}": (1, update_user),
+    "POST /portfolios": (1, create_portfolio),
+    "PUT /portfolios/{id}": (1, update_portfolio),
+    "DELETE /portfolios/{id}": (1, delete_portfolio),
+}
+
+
+def _weighted(
+    operations: dict[str, tuple[float, Operation]], share: float
+) -> dict[str, tuple[float, Operation]]:
+    return {
+        name: (share / len(operations), operation)
+        for name, (_, operation) in operations.items()
+    }
+
+
+SCENARIOS: dict[str, Scenario] = {
+    name: Scenario(name, {name: (1, operation)})
+    for name, (_, operation) in {**READS, **WRITES}.items()
+}
+SCENARIOS["reads"] = Scenario("reads", READS)
+SCENARIOS["writes"] = Scenario("writes", WRITES)
+SCENARIOS["mixed"] = Scenario(
+    "mixed", {**_weighted(READS, 0.9), **_weighted(WRITES, 0.1)}
+)
+
+
+async def prepare(client: httpx.AsyncClient, state: State) -> None:
+    """
+    Sample existing ids for the read operations.
+    """
+    users = (await client.get("/users")).raise_for_status().json()["items"]
+    portfolios = (
+        (await client.get("/portfolios")).raise_for_status().json()["items"]
+    )
+    if not users or not portfolios:
+        raise RuntimeError("The database needs at least a user and a portfolio")
+
+    state.user_ids = [user["id"] for user in users]
+    state.portfolio_ids = [portfolio["id"] for portfolio in portfolios]
+
+
+async def cleanup(client: httpx.AsyncClient, state: State) -> None:
+    """
+    Delete the rows created by write operations.
+    """
+    for portfolio_id in state.created_portfolio_ids:
+        await client.delete(f"/portfolios/{portfolio_id}")
+    for user_id in state.created_user_ids:
+        await client.delete(f"/users/{user_id}")
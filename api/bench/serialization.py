@@ -0,0 +1,116 @@
+"""
+Compare the list endpoint serialization paths on the same page of users:
+
+    python -m api.bench.serialization --limit 1000 --iterations 50
+
+"model" hydrates ORM instances then validates and encodes them against the
+response model, as FastAPI does for a returned Page, the former path of the
+list endpoints; "rows" renders plain row mappings with RowsResponse. Fetch
+and render times are reported apart, in milliseconds per page.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from statistics import mean
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from api.endpoints.responses import RowsResponse
+from api.models.user import UserModel
+from api.repositories.base import SessionManager
+from api.repositories.base import db_context
+from api.repositories.pagination import encode_cursor
+from api.repositories.user import UserRepository
+from api.schemas.pagination import Page
+
+page_adapter = TypeAdapter(Page[UserModel])
+
+
+async def fetch_model(limit: int) -> Page:
+    names, params = UserRepository.page_params(limit + 1)
+    statement = UserRepository.page_statement(UserModel, names)
+    rows = await statement.all(**params)
+    if len(rows) <= limit:
+        return Page(items=rows)
+
+    rows = rows[:limit]
+    return Page(items=rows, next_cursor=encode_cursor(rows[-1].id))
+
+
+def render_model(page: Page) -> bytes:
+    content = page_adapter.dump_python(
+        page_adapter.validate_python(page.model_dump()), mode="json"
+    )
+    return JSONResponse(content).body
+
+
+async def fetch_rows(limit: int) -> dict[str, Any]:
+    return await UserRepository.page_rows(limit)
+
+
+def render_rows(page: dict[str, Any]) -> bytes:
+    return RowsResponse(page).body
+
+
+PATHS: dict[
+    str, tuple[Callable[[int], Awaitable[Any]], Callable[[Any], bytes]]
+] = {
+    "model": (fetch_model, render_model),
+    "rows": (fetch_rows, render_rows),
+}
+
+
+async def measure(path: str, limit: int, iterations: int) -> dict[str, Any]:
+    fetch, render = PATHS[path]
+    fetch_times, render_times = [], []
+    size = 0
+
+    for _ in range(iterations):
+        db = SessionManager()
+        token = db_context.set(db)
+        try:
+            start = time.perf_counter()
+            page = await fetch(limit)
+            fetched = time.perf_counter()
+            size = len(render(page))
+            rendered = time.perf_counter()
+        finally:
+            db_context.reset(token)
+            await db.close()
+
+        fetch_times.append((fetched - start) * 1000)
+        render_times.append((rendered - fetched) * 1000)
+
+    return {
+        "fetch_ms": round(mean(fetch_times), 3),
+        "render_ms": round(mean(render_times), 3),
+        "total_ms": round(mean(fetch_times) + mean(render_times), 3),
+        "bytes": size,
+    }
+
+
+async def main(args: argparse.Namespace) -> dict[str, Any]:
+    results = {}
+    for path in PATHS:
+        await measure(path, args.limit, 1)
+        results[path] = await measure(path, args.limit, args.iterations)
+
+    results["speedup"] = round(
+        results["model"]["total_ms"] / results["rows"]["total_ms"], 2
+    )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m api.bench.serialization")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=50)
+    results = asyncio.run(main(parser.parse_args()))
+    sys.stdout.write(json.dumps(results, indent=2) + "\n")
@@ -10,3 +10,91 @@ DB_PORT = os.getenv("POSTGRES_PORT")
 
 DB_URL = f"{DB_USER}:{BD_PWD}@{DB_SERVICE_IP}:{DB_PORT}/{DB_NAME}"
 DB_LOG = bool(os.getenv("DB_LOG"))
+
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", 100))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", 1000))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+# Entity cache backend: "lru" (in-process), "redis" or empty to disable.
+# The in-process cache is not invalidated across workers, so with several
+# workers another worker may serve a row up to CACHE_TTL seconds stale: use
+# "redis" unless that is acceptable
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "lru")
+CACHE_TTL = float(os.getenv("CACHE_TTL", 60))
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", 10_000))
+REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
+
+BATCH_SIZE_MAX = int(os.getenv("BATCH_SIZE_MAX", 10_000))
+
+# Updates sent with Prefer: respond-async wait this many seconds to be
+# merged with later updates of the same row before they are written
+WRITE_BEHIND_FLUSH_INTERVAL = float(
+    os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", 0.05)
+)
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", 10_000))
+WRITE_BEHIND_MAX_OPERATIONS = int(
+    os.getenv("WRITE_BEHIND_MAX_OPERATIONS", 100_000)
+)
+
+# Warn when a request executes the same statement this many times
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", 5))
+
+CPU_COUNT = os.cpu_count() or 1
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", CPU_COUNT * 2))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", CPU_COUNT))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+
+# Connections opened and warmed up per pool on startup, at most DB_POOL_SIZE
+DB_POOL_PREFILL = min(
+    int(os.getenv("DB_POOL_PREFILL", DB_POOL_SIZE)), DB_POOL_SIZE
+)
+
+# Seconds to wait on shutdown for the requests in flight to finish
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", 30))
+# Seconds a worker asked to exit keeps serving with /ready failing, so load
+# balancers stop routing to it before it closes its listeners; set it to
+# at least their health check interval
+SHUTDOWN_PRESTOP_DELAY = float(os.getenv("SHUTDOWN_PRESTOP_DELAY", 0))
+
+# Identical concurrent reads share one query, up to this many distinct
+# reads in flight per worker; 0 disables coalescing
+DB_SINGLE_FLIGHT_MAX_KEYS = int(os.getenv("DB_SINGLE_FLIGHT_MAX_KEYS", 10_000))
+
+# Compiled SQL kept per engine, and prepared statements kept per connection
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", 500))
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(
+    os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", 100)
+)
+
+# Database concurrency limiter, per worker process. Size the limit based on
+# the DB service resources: raising it too high may overwhelm the DB causing
+# timeouts, typically a value between 50-100 is sufficient for high
+# efficiency. In "aimd" mode the limit adapts between DB_CONCURRENCY_MIN and
+# DB_CONCURRENCY_MAX to keep query latency under DB_LIMITER_TARGET_LATENCY.
+DB_LIMITER_MODE = os.getenv("DB_LIMITER_MODE", "fixed")
+DB_CONCURRENCY_LIMIT = int(os.getenv("DB_CONCURRENCY_LIMIT", 50))
+DB_CONCURRENCY_MIN = int(os.getenv("DB_CONCURRENCY_MIN", 4))
+DB_CONCURRENCY_MAX = int(os.getenv("DB_CONCURRENCY_MAX", 200))
+DB_LIMITER_TARGET_LATENCY = float(os.getenv("DB_LIMITER_TARGET_LATENCY", 0.05))
+DB_LIMITER_QUEUE_SIZE = int(os.getenv("DB_LIMITER_QUEUE_SIZE", 500))
+DB_LIMITER_QUEUE_TIMEOUT = float(os.getenv("DB_LIMITER_QUEUE_TIMEOUT", 5))
+
+# Comma separated read replicas, in the form user:password@host:port/db
+DB_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv("DB_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+DB_REPLICA_EJECT_SECONDS = float(os.getenv("DB_REPLICA_EJECT_SECONDS", 30))
+# Reads of a client stay on the primary for this long after it wrote
+DB_PRIMARY_STICKY_SECONDS = float(os.getenv("DB_PRIMARY_STICKY_SECONDS", 5))
+
+# Change feed: the NOTIFY channel row changes are published on, the events
+# buffered per subscriber before it is disconnected as too slow, and the
+# seconds between keepalives and between reconnects of the listener
+CHANGE_FEED_CHANNEL = os.getenv("CHANGE_FEED_CHANNEL", "changes")
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", 1000))
+CHANGE_FEED_KEEPALIVE = float(os.getenv("CHANGE_FEED_KEEPALIVE", 15))
+CHANGE_FEED_RECONNECT_INTERVAL = float(
+    os.getenv("CHANGE_FEED_RECONNECT_INTERVAL", 1)
+)
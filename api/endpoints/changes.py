@@ -0,0 +1,59 @@
+import asyncio
+from typing import AsyncGenerator
+from uuid import UUID
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from api.configuration import CHANGE_FEED_KEEPALIVE
+from api.enums.change_table import ChangeTable
+from api.repositories.change_feed import Subscription
+from api.repositories.change_feed import change_feed
+
+change_api = APIRouter()
+
+
+async def event_stream(subscription: Subscription) -> AsyncGenerator[str, None]:
+    """
+    The events of subscription as server-sent events, with a comment every
+    CHANGE_FEED_KEEPALIVE seconds without events so proxies keep the
+    connection open, ending with a close event carrying the reason.
+    """
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.get(), CHANGE_FEED_KEEPALIVE
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            if isinstance(event, str):
+                yield f"event: close\ndata: {event}\n\n"
+                return
+
+            yield f"event: {event.operation}\ndata: {event.model_dump_json()}\n\n"
+    finally:
+        change_feed.unsubscribe(subscription)
+
+
+@change_api.get("/changes")
+async def get_changes(
+    table: ChangeTable | None = None,
+    user_id: UUID | None = None,
+) -> StreamingResponse:
+    """
+    Stream the creates, updates and deletes of users and portfolios as
+    server-sent events, optionally only those of table, and of the user
+    user_id and its portfolios.
+
+    Events carry the id and version of the row, not the row itself. The
+    stream closes with an "overflow" or "reconnect" close event when events
+    may have been missed: reload the followed rows and subscribe again.
+    """
+    return StreamingResponse(
+        event_stream(change_feed.subscribe(table, user_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
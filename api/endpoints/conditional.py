@@ -0,0 +1,118 @@
+import re
+from datetime import datetime
+from datetime import timezone
+from email.utils import format_datetime
+from email.utils import parsedate_to_datetime
+from hashlib import sha1
+from typing import Sequence
+
+from fastapi import Response
+
+from api.models.base import EntityModel
+
+VERSION_TAG = re.compile(r'"(\d+)"')
+
+
+def entity_tag(row: EntityModel, fields: tuple[str, ...] | None = None) -> str:
+    """
+    The strong ETag of a row, its version, qualified by the selected fields
+    as a partial representation differs from the full one.
+    """
+    if fields is None:
+        return f'"{row.version}"'
+
+    return f'"{row.version};{"+".join(fields)}"'
+
+
+def collection_tag(rows: Sequence[EntityModel]) -> str:
+    """
+    The strong ETag of a list of rows, a digest of their ids and versions
+    regardless of their order.
+    """
+    digest = sha1()
+    for row in sorted(rows, key=lambda row: str(row.id)):
+        digest.update(f"{row.id}:{row.version};".encode())
+
+    return f'"{digest.hexdigest()}"'
+
+
+def parse_entity_tags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def validators(
+    etag: str, last_modified: datetime | None = None
+) -> dict[str, str]:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True
+        )
+
+    return headers
+
+
+def is_not_modified(
+    etag: str,
+    if_none_match: str | None,
+    last_modified: datetime | None = None,
+    if_modified_since: str | None = None,
+) -> bool:
+    """
+    Whether the client copy is current, RFC 9110 section 13.2.2: with
+    If-None-Match compared weakly, else with If-Modified-Since.
+    """
+    if if_none_match is not None:
+        tags = parse_entity_tags(if_none_match)
+        return "*" in tags or etag in [tag.removeprefix("W/") for tag in tags]
+
+    if last_modified is None or if_modified_since is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_get(
+    response: Response,
+    if_none_match: str | None,
+    if_modified_since: str | None,
+    etag: str,
+    last_modified: datetime | None = None,
+) -> Response | None:
+    """
+    Set the validators on response, and return the 304 response to send
+    instead of the body when the client copy is current.
+    """
+    headers = validators(etag, last_modified)
+    if is_not_modified(etag, if_none_match, last_modified, if_modified_since):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
+
+def if_match_versions(if_match: str | None) -> list[int] | None:
+    """
+    The row versions an If-Match header accepts, or None when it accepts
+    any. Weak tags never match, RFC 9110 section 13.1.1.
+    """
+    if if_match is None:
+        return None
+
+    tags = parse_entity_tags(if_match)
+    if "*" in tags:
+        return None
+
+    return [
+        int(match.group(1))
+        for match in map(VERSION_TAG.fullmatch, tags)
+        if match is not None
+    ]
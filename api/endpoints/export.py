@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+from typing import Any
+from typing import AsyncGenerator
+from typing import Type
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import RowMapping
+
+from api.enums.export_format import ExportFormat
+from api.repositories.base import BaseRepository
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+async def ndjson_lines(
+    batches: AsyncGenerator[list[RowMapping], None],
+) -> AsyncGenerator[str, None]:
+    async for batch in batches:
+        yield "".join(
+            json.dumps(dict(row), default=str) + "\n" for row in batch
+        )
+
+
+async def csv_lines(
+    batches: AsyncGenerator[list[RowMapping], None],
+    columns: list[str],
+) -> AsyncGenerator[str, None]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    async for batch in batches:
+        writer.writerows([row[column] for column in columns] for row in batch)
+        yield buffer.getvalue()
+
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(
+    repository: Type[BaseRepository],
+    format: ExportFormat,
+    **filters: Any,
+) -> StreamingResponse:
+    """
+    Build a streamed export of the repository table in the given format.
+
+    repository: Type[BaseRepository], The repository of the exported table.
+    format: ExportFormat, The output format.
+    **filters: Any, Equality filters, see BaseRepository.filtered.
+    """
+    batches = repository.stream(**filters)
+    table = repository.orm_model.__table__
+
+    if format == ExportFormat.CSV:
+        content = csv_lines(batches, [column.name for column in table.columns])
+    else:
+        content = ndjson_lines(batches)
+
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f"attachment; filename={table.name}.{format}"
+        },
+    )
@@ -0,0 +1,184 @@
+from importlib.util import find_spec
+from typing import Any
+
+from fastapi import Response
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import Integer
+from sqlalchemy import RowMapping
+from sqlalchemy import Table
+from sqlalchemy import Uuid
+from sqlalchemy import types as sa_types
+
+from api.endpoints.responses import RowsResponse
+from api.endpoints.responses import encode_default
+
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+
+# Optional dependencies, install with: poetry install -E formats
+PAGE_MEDIA_TYPES = [JSON] + [
+    media_type
+    for media_type, module in (
+        (ARROW_STREAM, "pyarrow"),
+        (MSGPACK, "ormsgpack"),
+    )
+    if find_spec(module) is not None
+]
+# OpenAPI description of the list endpoints answering in those
+PAGE_RESPONSES: dict[int | str, dict[str, Any]] = {
+    200: {"content": {media_type: {} for media_type in PAGE_MEDIA_TYPES[1:]}}
+}
+
+
+def media_ranges(accept: str) -> list[tuple[str, float]]:
+    """
+    The media ranges of an Accept header with their quality values.
+    """
+    ranges = []
+    for part in accept.split(","):
+        media_range, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        if media_range:
+            ranges.append((media_range.lower(), quality))
+
+    return ranges
+
+
+def negotiate(accept: str | None, offers: list[str]) -> str | None:
+    """
+    The media type of offers the Accept header prefers, RFC 9110 section
+    12.5.1, the earliest on ties, or None when it accepts none of them.
+    """
+    if accept is None:
+        return offers[0]
+
+    ranges = media_ranges(accept)
+    best, best_quality = None, 0.0
+    for offer in offers:
+        quality = 0.0
+        for candidate in (offer, f"{offer.split('/')[0]}/*", "*/*"):
+            matches = [
+                q for media_range, q in ranges if media_range == candidate
+            ]
+            if matches:
+                quality = matches[0]
+                break
+
+        if quality > best_quality:
+            best, best_quality = offer, quality
+
+    return best
+
+
+def arrow_array(column: Column, values: list[Any]) -> Any:
+    """
+    The Arrow array of the values of column, typed after the column type.
+    Enums are dictionary encoded over all their members, so every page of a
+    table shares the same dictionary.
+    """
+    import pyarrow as pa
+
+    if (
+        isinstance(column.type, sa_types.Enum)
+        and column.type.enum_class is not None
+    ):
+        members = list(column.type.enum_class)
+        index = {member: i for i, member in enumerate(members)}
+        return pa.DictionaryArray.from_arrays(
+            pa.array([index.get(value) for value in values], pa.int8()),
+            pa.array([member.value for member in members], pa.string()),
+        )
+
+    if isinstance(column.type, Uuid):
+        return pa.array(
+            [None if value is None else str(value) for value in values],
+            pa.string(),
+        )
+
+    if isinstance(column.type, DateTime):
+        return pa.array(values, pa.timestamp("us", tz="UTC"))
+
+    if isinstance(column.type, Integer):
+        return pa.array(values, pa.int64())
+
+    return pa.array(values, pa.string())
+
+
+def arrow_stream(
+    rows: list[RowMapping], columns: list[Column], metadata: dict[str, str]
+) -> bytes:
+    """
+    Encode rows as a single record batch in the Arrow IPC stream format,
+    one column at a time.
+    """
+    import pyarrow as pa
+
+    arrays = [
+        arrow_array(column, [row[column.name] for row in rows])
+        for column in columns
+    ]
+    schema = pa.schema(
+        [
+            pa.field(column.name, array.type, nullable=column.nullable)
+            for column, array in zip(columns, arrays)
+        ],
+        metadata=metadata,
+    )
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(pa.record_batch(arrays, schema=schema))
+
+    return sink.getvalue().to_pybytes()
+
+
+def msgpack_page(page: dict[str, Any]) -> bytes:
+    """
+    Encode a page of row mappings as msgpack with ormsgpack, in the shape
+    and with the values of the JSON one.
+    """
+    import ormsgpack
+
+    return ormsgpack.packb(page, default=encode_default)
+
+
+def page_response(
+    page: dict[str, Any],
+    media_type: str,
+    table: Table,
+    fields: tuple[str, ...] | None = None,
+) -> Response:
+    """
+    Render a page of row mappings, see BaseRepository.page_rows, in the
+    negotiated media type. Arrow streams hold the table columns in fields,
+    all when None, and carry the cursor of the next page in their schema
+    metadata.
+    """
+    headers = {"Vary": "Accept"}
+    if media_type == ARROW_STREAM:
+        columns = list(table.columns)
+        if fields is not None:
+            columns = [table.columns[name] for name in fields]
+        metadata = {"next_cursor": page["next_cursor"] or ""}
+        return Response(
+            content=arrow_stream(page["items"], columns, metadata),
+            media_type=ARROW_STREAM,
+            headers=headers,
+        )
+
+    if media_type == MSGPACK:
+        return Response(
+            content=msgpack_page(page), media_type=MSGPACK, headers=headers
+        )
+
+    return RowsResponse(page, headers=headers)
@@ -0,0 +1,47 @@
+from uuid import UUID
+
+from fastapi import APIRouter
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from api.repositories.write_behind import operations
+from api.schemas.operation import OperationModel
+
+operation_api = APIRouter()
+
+
+def prefers_async(prefer: str | None) -> bool:
+    """
+    Whether a Prefer header asks for respond-async, RFC 7240.
+    """
+    if prefer is None:
+        return False
+
+    return any(
+        preference.split(";")[0].strip().lower() == "respond-async"
+        for preference in prefer.split(",")
+    )
+
+
+def accepted_response(operation: OperationModel) -> JSONResponse:
+    return JSONResponse(
+        content=operation.model_dump(mode="json"),
+        status_code=202,
+        headers={
+            "Location": f"/operations/{operation.id}",
+            "Preference-Applied": "respond-async",
+        },
+    )
+
+
+@operation_api.get("/operations/{operation_id}")
+async def get_operation(operation_id: UUID) -> OperationModel:
+    """
+    Operations are kept by the worker process that accepted them, so with
+    several workers the status may only be known to one of them.
+    """
+    operation = operations.get(operation_id)
+    if operation is None:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    return operation
@@ -1,21 +1,126 @@
+from typing import Annotated
 from uuid import UUID
 
 from fastapi import APIRouter
-
-from models.portfolio import PortfolioModel
-from repositories.base import managed_session
-from repositories.portfolio import PortfolioRepository
-from schemas.portfolio import PortfolioCreateModel
-from schemas.portfolio import PortfolioUpdateModel
+from fastapi import Body
+from fastapi import Header
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import AfterValidator
+
+from api.configuration import BATCH_SIZE_MAX
+from api.configuration import PAGE_SIZE_DEFAULT
+from api.configuration import PAGE_SIZE_MAX
+from api.endpoints.conditional import conditional_get
+from api.endpoints.conditional import entity_tag
+from api.endpoints.conditional import if_match_versions
+from api.endpoints.conditional import validators
+from api.endpoints.export import export_response
+from api.endpoints.formats import PAGE_MEDIA_TYPES
+from api.endpoints.formats import PAGE_RESPONSES
+from api.endpoints.formats import negotiate
+from api.endpoints.formats import page_response
+from api.endpoints.operations import accepted_response
+from api.endpoints.operations import prefers_async
+from api.endpoints.responses import partial_response
+from api.enums.change_operation import ChangeOperation
+from api.enums.export_format import ExportFormat
+from api.enums.portfolio_type import PortfolioType
+from api.models.portfolio import PortfolioModel
+from api.repositories.base import managed_session
+from api.repositories.fields import InvalidFieldsError
+from api.repositories.fields import parse_fields
+from api.repositories.pagination import InvalidCursorError
+from api.repositories.portfolio import PortfolioRepository
+from api.repositories.portfolio import portfolio_writes
+from api.schemas.batch import BatchResult
+from api.schemas.batch import unique_ids
+from api.schemas.operation import OperationModel
+from api.schemas.pagination import Page
+from api.schemas.portfolio import PortfolioBatchUpdateModel
+from api.schemas.portfolio import PortfolioCreateModel
+from api.schemas.portfolio import PortfolioUpdateModel
 
 portfolio_api = APIRouter()
 
 
-@portfolio_api.get("/portfolios/{portfolio_id}")
+@portfolio_api.get(
+    "/portfolios",
+    response_model=Page[PortfolioModel],
+    responses=PAGE_RESPONSES,
+)
+async def get_portfolios(
+    limit: int = Query(default=PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = None,
+    type: PortfolioType | None = None,
+    user_id: UUID | None = None,
+    fields: str | None = None,
+    accept: str | None = Header(default=None),
+) -> Response:
+    media_type = negotiate(accept, PAGE_MEDIA_TYPES)
+    if media_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Acceptable: {', '.join(PAGE_MEDIA_TYPES)}",
+        )
+
+    try:
+        columns = parse_fields(PortfolioModel.__table__, fields)
+        return page_response(
+            await PortfolioRepository.page_rows(
+                limit, cursor, columns, type=type, user_id=user_id
+            ),
+            media_type,
+            PortfolioModel.__table__,
+            columns,
+        )
+    except (InvalidCursorError, InvalidFieldsError) as exp:
+        raise HTTPException(status_code=400, detail=str(exp))
+
+
+@portfolio_api.get("/portfolios/export")
+async def export_portfolios(
+    format: ExportFormat = ExportFormat.NDJSON,
+    type: PortfolioType | None = None,
+    user_id: UUID | None = None,
+) -> StreamingResponse:
+    return export_response(
+        PortfolioRepository, format, type=type, user_id=user_id
+    )
+
+
+@portfolio_api.get(
+    "/portfolios/{portfolio_id}", response_model=PortfolioModel | None
+)
 async def get_portfolio(
     portfolio_id: UUID,
-) -> PortfolioModel | None:
-    return await PortfolioRepository.get(portfolio_id)
+    response: Response,
+    fields: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    if_modified_since: str | None = Header(default=None),
+) -> PortfolioModel | Response | None:
+    try:
+        columns = parse_fields(PortfolioModel.__table__, fields)
+    except InvalidFieldsError as exp:
+        raise HTTPException(status_code=400, detail=str(exp))
+
+    portfolio = await PortfolioRepository.get(portfolio_id)
+    if portfolio is None:
+        return None
+
+    not_modified = conditional_get(
+        response,
+        if_none_match,
+        if_modified_since,
+        entity_tag(portfolio, columns),
+        portfolio.updated_at,
+    )
+    if not_modified is not None or columns is None:
+        return not_modified or portfolio
+
+    return partial_response(portfolio, columns, response.headers)
 
 
 @portfolio_api.post("/portfolios")
@@ -27,41 +132,78 @@ async def create_portfolio(
             type=portfolio_create.type, user_id=portfolio_create.user_id
         )
         session.add(portfolio)
+        await session.flush()
+        await PortfolioRepository.publish(
+            session, ChangeOperation.CREATED, [portfolio]
+        )
         await session.commit()
         await session.refresh(portfolio)
 
+    await PortfolioRepository.cache_refresh(portfolio)
     return portfolio
 
 
+@portfolio_api.post("/portfolios:batch")
+async def create_portfolios(
+    portfolios_create: list[PortfolioCreateModel] = Body(
+        max_length=BATCH_SIZE_MAX
+    ),
+) -> BatchResult[PortfolioModel]:
+    return await PortfolioRepository.insert_many(portfolios_create)
+
+
+@portfolio_api.put("/portfolios:batch")
+async def update_portfolios(
+    portfolios_update: Annotated[
+        list[PortfolioBatchUpdateModel],
+        AfterValidator(unique_ids),
+        Body(max_length=BATCH_SIZE_MAX),
+    ],
+) -> BatchResult[PortfolioModel]:
+    return await PortfolioRepository.update_many(portfolios_update)
+
+
+@portfolio_api.delete("/portfolios:batch")
+async def delete_portfolios(
+    portfolio_ids: list[UUID] = Body(max_length=BATCH_SIZE_MAX),
+) -> BatchResult[PortfolioModel]:
+    return await PortfolioRepository.delete_many(portfolio_ids)
+
+
 @portfolio_api.delete("/portfolios/{portfolio_id}")
 async def delete_portfolio(
     portfolio_id: UUID,
+    if_match: str | None = Header(default=None),
 ) -> PortfolioModel | None:
-    portfolio = await PortfolioRepository.get(portfolio_id)
-    if portfolio is None:
-        return None
-
-    async with managed_session() as session:
-        await session.delete(portfolio)
-        await session.commit()
+    return await PortfolioRepository.delete_returning(
+        portfolio_id, if_match_versions(if_match)
+    )
 
-    return portfolio
 
-
-@portfolio_api.put("/portfolios/{portfolio_id}")
+@portfolio_api.put(
+    "/portfolios/{portfolio_id}",
+    response_model=PortfolioModel | None,
+    responses={202: {"model": OperationModel}},
+)
 async def update_portfolio(
     portfolio_id: UUID,
     portfolio_update: PortfolioUpdateModel,
-) -> PortfolioModel | None:
-    portfolio = await PortfolioRepository.get(portfolio_id)
-    if portfolio is None:
-        return None
-
-    portfolio.update(portfolio_update)
-
-    async with managed_session() as session:
-        session.add(portfolio)
-        await session.commit()
-        await session.refresh(portfolio)
+    response: Response,
+    if_match: str | None = Header(default=None),
+    prefer: str | None = Header(default=None),
+) -> PortfolioModel | Response | None:
+    # Queued updates are merged, so conditional ones are applied right away
+    if if_match is None and prefers_async(prefer):
+        operation = portfolio_writes.enqueue(portfolio_id, portfolio_update)
+        if operation is not None:
+            return accepted_response(operation)
+
+    portfolio = await PortfolioRepository.update_returning(
+        portfolio_id, portfolio_update, if_match_versions(if_match)
+    )
+    if portfolio is not None:
+        response.headers.update(
+            validators(entity_tag(portfolio), portfolio.updated_at)
+        )
 
     return portfolio
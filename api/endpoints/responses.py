@@ -0,0 +1,70 @@
+import json
+from collections.abc import Mapping
+from typing import Any
+from uuid import UUID
+
+import orjson
+from fastapi import Response
+from sqlmodel import SQLModel
+
+from api.schemas.partial import partial_model
+
+
+def encode_default(obj: Any) -> Any:
+    """
+    Encode the row values orjson and ormsgpack do not support natively.
+    """
+    # asyncpg returns its own UUID subclass, which they do not recognize
+    if isinstance(obj, UUID):
+        return str(obj)
+
+    if isinstance(obj, Mapping):
+        return dict(obj)
+
+    raise TypeError(f"Type is not serializable: {type(obj).__name__}")
+
+
+class RowsResponse(Response):
+    """
+    JSON response rendered by orjson, which encodes UUIDs, enums and row
+    mappings without going through Pydantic. Returning it from an endpoint
+    skips the validation and encoding of the return value against the
+    response model, which then only documents the route.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=encode_default)
+
+
+def json_page_response(items: list[str], next_cursor: str | None) -> Response:
+    """
+    Assemble a Page response from items already serialized to JSON, e.g. by
+    Postgres, without parsing them back.
+    """
+    content = (
+        '{"items":['
+        + ",".join(items)
+        + '],"next_cursor":'
+        + json.dumps(next_cursor)
+        + "}"
+    )
+    return Response(content=content, media_type="application/json")
+
+
+def partial_response(
+    row: SQLModel, fields: tuple[str, ...], headers: Mapping[str, str]
+) -> Response:
+    """
+    Render only the selected fields of row, validated and serialized by
+    their partial model, see schemas.partial.
+    """
+    model = partial_model(type(row), fields)
+    return Response(
+        content=model.model_validate(
+            row, from_attributes=True
+        ).model_dump_json(),
+        media_type="application/json",
+        headers=dict(headers),
+    )
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+
+from api.repositories.stats import StatsRepository
+from api.schemas.stats import StatsModel
+
+stats_api = APIRouter()
+
+
+@stats_api.get("/stats", response_model_exclude_none=True)
+async def get_stats(approximate: bool = False) -> StatsModel:
+    """
+    Counts of users and portfolios. With approximate=true only the totals
+    are returned, as estimated by Postgres from its table statistics.
+    """
+    if approximate:
+        return await StatsRepository.estimates()
+
+    return await StatsRepository.stats()
@@ -0,0 +1,35 @@
+from fastapi import APIRouter
+from fastapi import Response
+
+from api.lifecycle import lifecycle
+from api.metrics import latest
+from api.repositories.cache import entity_cache
+
+system_api = APIRouter()
+
+
+@system_api.get("/")
+def get_root() -> Response:
+    return Response(content="OK", status_code=200)
+
+
+@system_api.get("/ready")
+def get_ready() -> Response:
+    if not lifecycle.ready:
+        return Response(content="Not ready", status_code=503)
+
+    return Response(content="OK", status_code=200)
+
+
+@system_api.get("/cache/stats")
+def get_cache_stats() -> dict[str, int]:
+    if entity_cache is None:
+        return {}
+
+    return entity_cache.stats.as_dict()
+
+
+@system_api.get("/metrics")
+def get_metrics() -> Response:
+    content, media_type = latest()
+    return Response(content=content, media_type=media_type)
@@ -1,20 +1,99 @@
+from typing import Annotated
 from uuid import UUID
 
 from fastapi import APIRouter
-
-from models.portfolio import PortfolioModel
-from models.user import UserModel
-from repositories.base import managed_session
-from repositories.user import UserRepository
-from schemas.user import UserCreateModel
-from schemas.user import UserUpdateModel
+from fastapi import Body
+from fastapi import Header
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import AfterValidator
+
+from api.configuration import BATCH_SIZE_MAX
+from api.configuration import PAGE_SIZE_DEFAULT
+from api.configuration import PAGE_SIZE_MAX
+from api.endpoints.conditional import collection_tag
+from api.endpoints.conditional import conditional_get
+from api.endpoints.conditional import entity_tag
+from api.endpoints.conditional import if_match_versions
+from api.endpoints.conditional import validators
+from api.endpoints.export import export_response
+from api.endpoints.formats import JSON
+from api.endpoints.formats import PAGE_MEDIA_TYPES
+from api.endpoints.formats import PAGE_RESPONSES
+from api.endpoints.formats import negotiate
+from api.endpoints.formats import page_response
+from api.endpoints.responses import json_page_response
+from api.endpoints.responses import partial_response
+from api.enums.change_operation import ChangeOperation
+from api.enums.export_format import ExportFormat
+from api.enums.subscription_plan import SubscriptionPlan
+from api.enums.user_include import UserInclude
+from api.models.portfolio import PortfolioModel
+from api.models.user import UserModel
+from api.repositories.base import managed_session
+from api.repositories.fields import InvalidFieldsError
+from api.repositories.fields import parse_fields
+from api.repositories.pagination import InvalidCursorError
+from api.repositories.user import UserRepository
+from api.schemas.batch import BatchResult
+from api.schemas.batch import unique_ids
+from api.schemas.pagination import Page
+from api.schemas.user import UserBatchUpdateModel
+from api.schemas.user import UserCreateModel
+from api.schemas.user import UserUpdateModel
+from api.schemas.user import UserWithPortfoliosModel
 
 user_api = APIRouter()
 
 
-@user_api.get("/users")
-async def get_users() -> list[UserModel]:
-    return await UserRepository.all()
+@user_api.get(
+    "/users",
+    response_model=Page[UserModel] | Page[UserWithPortfoliosModel],
+    responses=PAGE_RESPONSES,
+)
+async def get_users(
+    limit: int = Query(default=PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = None,
+    plan: SubscriptionPlan | None = None,
+    include: UserInclude | None = None,
+    fields: str | None = None,
+    accept: str | None = Header(default=None),
+) -> Response:
+    # Users with their portfolios are only assembled as JSON, by Postgres
+    offers = [JSON] if include == UserInclude.PORTFOLIOS else PAGE_MEDIA_TYPES
+    media_type = negotiate(accept, offers)
+    if media_type is None:
+        raise HTTPException(
+            status_code=406, detail=f"Acceptable: {', '.join(offers)}"
+        )
+
+    try:
+        columns = parse_fields(UserModel.__table__, fields)
+        if include == UserInclude.PORTFOLIOS:
+            return json_page_response(
+                *await UserRepository.page_with_portfolios(
+                    limit, cursor, columns, plan=plan
+                )
+            )
+
+        return page_response(
+            await UserRepository.page_rows(limit, cursor, columns, plan=plan),
+            media_type,
+            UserModel.__table__,
+            columns,
+        )
+    except (InvalidCursorError, InvalidFieldsError) as exp:
+        raise HTTPException(status_code=400, detail=str(exp))
+
+
+@user_api.get("/users/export")
+async def export_users(
+    format: ExportFormat = ExportFormat.NDJSON,
+    plan: SubscriptionPlan | None = None,
+) -> StreamingResponse:
+    return export_response(UserRepository, format, plan=plan)
 
 
 @user_api.post("/users")
@@ -29,51 +108,100 @@ async def create_user(
             plan=user_create.plan,
         )
         session.add(user)
+        await session.flush()
+        await UserRepository.publish(session, ChangeOperation.CREATED, [user])
         await session.commit()
         await session.refresh(user)
 
+    await UserRepository.cache_refresh(user)
     return user
 
 
-@user_api.get("/users/{user_id}")
+@user_api.post("/users:batch")
+async def create_users(
+    users_create: list[UserCreateModel] = Body(max_length=BATCH_SIZE_MAX),
+) -> BatchResult[UserModel]:
+    return await UserRepository.insert_many(users_create)
+
+
+@user_api.put("/users:batch")
+async def update_users(
+    users_update: Annotated[
+        list[UserBatchUpdateModel],
+        AfterValidator(unique_ids),
+        Body(max_length=BATCH_SIZE_MAX),
+    ],
+) -> BatchResult[UserModel]:
+    return await UserRepository.update_many(users_update)
+
+
+@user_api.get("/users/{user_id}", response_model=UserModel | None)
 async def get_user(
     user_id: UUID,
-) -> UserModel | None:
-    return await UserRepository.get(user_id)
+    response: Response,
+    fields: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    if_modified_since: str | None = Header(default=None),
+) -> UserModel | Response | None:
+    try:
+        columns = parse_fields(UserModel.__table__, fields)
+    except InvalidFieldsError as exp:
+        raise HTTPException(status_code=400, detail=str(exp))
+
+    user = await UserRepository.get(user_id)
+    if user is None:
+        return None
+
+    not_modified = conditional_get(
+        response,
+        if_none_match,
+        if_modified_since,
+        entity_tag(user, columns),
+        user.updated_at,
+    )
+    if not_modified is not None or columns is None:
+        return not_modified or user
+
+    return partial_response(user, columns, response.headers)
 
 
 @user_api.put("/users/{user_id}")
 async def update_user(
     user_id: UUID,
     user_update: UserUpdateModel,
+    response: Response,
+    if_match: str | None = Header(default=None),
 ) -> UserModel | None:
-    user = await UserRepository.get(user_id)
-    if user is None:
-        return None
-
-    user.update(user_update)
-
-    async with managed_session() as session:
-        session.add(user)
-        await session.commit()
-        await session.refresh(user)
+    user = await UserRepository.update_returning(
+        user_id, user_update, if_match_versions(if_match)
+    )
+    if user is not None:
+        response.headers.update(validators(entity_tag(user), user.updated_at))
 
     return user
 
 
 @user_api.delete("/users/{user_id}")
-async def delete_user(user_id: UUID) -> UserModel | None:
-    user = await UserRepository.get(user_id)
-    if user is None:
-        return None
-
-    async with managed_session() as session:
-        await session.delete(user)
-        await session.commit()
-
-    return user
+async def delete_user(
+    user_id: UUID,
+    if_match: str | None = Header(default=None),
+) -> UserModel | None:
+    return await UserRepository.delete_returning(
+        user_id, if_match_versions(if_match)
+    )
 
 
-@user_api.get("/users/{user_id}/portfolios")
-async def get_user_portfolios(user_id: UUID) -> list[PortfolioModel] | None:
-    return await UserRepository.get_portfolios(user_id)
+@user_api.get(
+    "/users/{user_id}/portfolios",
+    response_model=list[PortfolioModel] | None,
+)
+async def get_user_portfolios(
+    user_id: UUID,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+) -> list[PortfolioModel] | Response | None:
+    portfolios = await UserRepository.get_portfolios(user_id)
+    not_modified = conditional_get(
+        response, if_none_match, None, collection_tag(portfolios)
+    )
+    return not_modified or portfolios
@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class ChangeOperation(Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+    def __str__(self) -> str:
+        return f"{self.value}"
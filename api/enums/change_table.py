@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class ChangeTable(Enum):
+    USERS = "users"
+    PORTFOLIOS = "portfolios"
+
+    def __str__(self) -> str:
+        return f"{self.value}"
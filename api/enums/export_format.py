@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class ExportFormat(Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+    def __str__(self) -> str:
+        return f"{self.value}"
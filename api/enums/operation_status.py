@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class OperationStatus(Enum):
+    PENDING = "pending"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    def __str__(self) -> str:
+        return f"{self.value}"
@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class StatsDimension(Enum):
+    PLAN = "plan"
+    TYPE = "type"
+    PLAN_TYPE = "plan_type"
+    PORTFOLIOS_PER_USER = "portfolios_per_user"
+
+    def __str__(self) -> str:
+        return f"{self.value}"
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class UserInclude(Enum):
+    PORTFOLIOS = "portfolios"
+
+    def __str__(self) -> str:
+        return f"{self.value}"
@@ -0,0 +1,108 @@
+import asyncio
+import signal
+from typing import Callable
+
+
+class Lifecycle:
+    """
+    Readiness and in-flight requests of the worker process, for readiness
+    probes and graceful shutdown.
+    """
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.draining = False
+        self.in_flight = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+    def request_started(self) -> None:
+        self.in_flight += 1
+        self.idle.clear()
+
+    def request_finished(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self.idle.set()
+
+    def leave_rotation(self) -> None:
+        """
+        Stop being ready, so load balancers stop routing new requests to the
+        worker, while still serving those that reach it.
+        """
+        self.ready = False
+
+    def start_draining(self) -> None:
+        """
+        Stop being ready and refuse new requests.
+        """
+        self.ready = False
+        self.draining = True
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Stop being ready, so new requests are refused, and wait up to timeout
+        seconds for the requests in flight to finish. Return whether they
+        all did.
+        """
+        self.start_draining()
+        try:
+            await asyncio.wait_for(self.idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+        return True
+
+
+def on_exit_signal(callback: Callable[[], None], delay: float = 0.0) -> None:
+    """
+    Run callback on the event loop as soon as the server is asked to exit,
+    chaining the SIGINT and SIGTERM handlers it installed; without such
+    handlers, e.g. outside a server, do nothing.
+
+    Uvicorn closes its listeners and waits for the requests in flight and
+    the open connections to finish before the lifespan shutdown starts, so
+    whatever must happen while the worker still serves, e.g. failing the
+    readiness probe or ending responses streaming until the client leaves,
+    must happen on the signal itself.
+
+    With delay, the signal is held back for delay seconds, then callback
+    runs and the signal is passed on, so the worker keeps serving
+    meanwhile. Handlers chained later run first, on the signal itself. A
+    second signal is passed on at once.
+    """
+    loop = asyncio.get_running_loop()
+    signalled = False
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(signum)
+        if not callable(previous) or previous is signal.default_int_handler:
+            continue
+
+        def handler(signum, frame, previous=previous) -> None:
+            nonlocal signalled
+            if signalled or not delay:
+                loop.call_soon_threadsafe(callback)
+                previous(signum, frame)
+            else:
+                loop.call_soon_threadsafe(
+                    loop.call_later,
+                    delay,
+                    _pass_on,
+                    callback,
+                    previous,
+                    signum,
+                    frame,
+                )
+            signalled = True
+
+        signal.signal(signum, handler)
+
+
+def _pass_on(
+    callback: Callable[[], None], previous: Callable, signum: int, frame
+) -> None:
+    callback()
+    previous(signum, frame)
+
+
+lifecycle = Lifecycle()
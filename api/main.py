@@ -1,68 +1,127 @@
-import asyncio
-import datetime
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
 
-import httpx
 from fastapi import FastAPI
 from fastapi import Request
 from fastapi import Response
 from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
 
+from api.configuration import DB_POOL_PREFILL
+from api.configuration import SHUTDOWN_DRAIN_TIMEOUT
+from api.configuration import SHUTDOWN_PRESTOP_DELAY
+from api.endpoints.changes import change_api
+from api.endpoints.operations import operation_api
 from api.endpoints.portfolio import portfolio_api
+from api.endpoints.stats import stats_api
+from api.endpoints.system import system_api
 from api.endpoints.users import user_api
-from repositories.base import db_context
-from repositories.base import new_db_instance
-
-app = FastAPI()
-app.include_router(user_api)
-app.include_router(portfolio_api)
-
-
-@app.middleware("http")
-async def set_db_context(request: Request, call_next):
+from api.lifecycle import lifecycle
+from api.lifecycle import on_exit_signal
+from api.logger import logger
+from api.metrics import mark_process_dead
+from api.middleware import DBContextMiddleware
+from api.middleware import DrainMiddleware
+from api.middleware import MetricsMiddleware
+from api.repositories.base import VersionMismatchError
+from api.repositories.change_feed import change_feed
+from api.repositories.limiter import LimiterOverloadedError
+from api.repositories.portfolio import PortfolioRepository
+from api.repositories.portfolio import portfolio_writes
+from api.repositories.stats import StatsRepository
+from api.repositories.user import UserRepository
+from api.repositories.warmup import WarmUpError
+from api.repositories.warmup import dispose
+from api.repositories.warmup import warm_up
+
+
+def stop_serving() -> None:
+    """
+    Refuse new requests and end the change feed streams, as the server
+    starts shutting down.
+    """
+    lifecycle.start_draining()
+    change_feed.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     try:
-        async with new_db_instance() as db:
-            token = db_context.set(db)
-
-            response = await call_next(request)
-    finally:
-        db_context.reset(token)
-
-    return response
-
-
-@app.get("/")
-def get_root() -> Response:
-    return Response(content="OK", status_code=200)
-
-
-@app.get("/benchmark-serial")
-async def benchmark_serial() -> Response:
-    start = datetime.datetime.now()
-    stats = {}
-    while True:
-        async with httpx.AsyncClient() as client:
-            r = await client.get("http://localhost:8000/users")
-
-        if r.status_code in stats:
-            stats[r.status_code] += 1
-        else:
-            stats[r.status_code] = 1
-
-        if datetime.datetime.now() - start > datetime.timedelta(minutes=1):
-            break
-
-    return JSONResponse(content=stats, status_code=200)
-
-
-@app.get("/benchmark-concurrent/{n}")
-async def benchmark_concurrent(n: int) -> Response:
-
-    stats = {}
-    async with httpx.AsyncClient(timeout=None) as client:
-        tasks = [client.get("http://localhost:8000/users") for _ in range(n)]
-
-        start = datetime.datetime.now()
-        await asyncio.gather(*tasks)
-
-    stats["time_taken"] = f"{datetime.datetime.now() - start}"
-    return JSONResponse(content=stats, status_code=200)
+        await warm_up(
+            DB_POOL_PREFILL,
+            [UserRepository, PortfolioRepository, StatsRepository],
+        )
+    except WarmUpError:
+        await dispose()
+        raise
+
+    portfolio_writes.start()
+    change_feed.start()
+    on_exit_signal(stop_serving, delay=SHUTDOWN_PRESTOP_DELAY)
+    on_exit_signal(lifecycle.leave_rotation)
+    lifecycle.ready = True
+
+    yield
+
+    await change_feed.stop()
+    if not await lifecycle.drain(SHUTDOWN_DRAIN_TIMEOUT):
+        logger.warning(
+            f"{lifecycle.in_flight} requests still in flight after "
+            f"{SHUTDOWN_DRAIN_TIMEOUT}s, shutting down anyway"
+        )
+    await portfolio_writes.drain()
+    await dispose()
+    mark_process_dead()
+
+
+async def handle_limiter_overloaded(
+    request: Request, exp: Exception
+) -> Response:
+    return JSONResponse(
+        content={"detail": str(exp)},
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
+
+
+async def handle_version_mismatch(request: Request, exp: Exception) -> Response:
+    return JSONResponse(content={"detail": str(exp)}, status_code=412)
+
+
+async def handle_integrity_error(request: Request, exp: Exception) -> Response:
+    return JSONResponse(
+        content={"detail": "Conflicts with an existing row"}, status_code=409
+    )
+
+
+def create_app() -> FastAPI:
+    """
+    Build the app with its routers, middlewares and exception handlers.
+    Building it opens nothing: the engines are created on first use, by the
+    warm up of the lifespan, so a new worker only pays for its imports
+    before it starts serving.
+    """
+    app = FastAPI(lifespan=lifespan)
+    for router in (
+        user_api,
+        portfolio_api,
+        operation_api,
+        stats_api,
+        change_api,
+        system_api,
+    ):
+        app.include_router(router)
+
+    app.add_middleware(DBContextMiddleware)
+    app.add_middleware(DrainMiddleware, lifecycle=lifecycle)
+    app.add_middleware(MetricsMiddleware)
+
+    app.add_exception_handler(LimiterOverloadedError, handle_limiter_overloaded)
+    app.add_exception_handler(VersionMismatchError, handle_version_mismatch)
+    app.add_exception_handler(IntegrityError, handle_integrity_error)
+
+    return app
+
+
+# The app served by fastapi run api/main.py, which takes no factory
+app = create_app()
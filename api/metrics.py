@@ -0,0 +1,124 @@
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import CollectorRegistry
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+from prometheus_client import generate_latest
+from prometheus_client import multiprocess
+from prometheus_client import registry
+from sqlalchemy import QueuePool
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# With multiple workers, e.g. fastapi run --workers 8, set
+# PROMETHEUS_MULTIPROC_DIR to an empty directory shared by the workers, so
+# every worker writes its samples there and /metrics aggregates them all.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being served",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Connections opened beyond the pool size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pool connection",
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts",
+    "Pool checkouts that timed out",
+)
+DB_LIMITER_LIMIT = Gauge(
+    "db_limiter_limit",
+    "Database concurrency limit",
+    multiprocess_mode="livesum",
+)
+DB_LIMITER_IN_USE = Gauge(
+    "db_limiter_in_use",
+    "Database concurrency permits held",
+    multiprocess_mode="livesum",
+)
+DB_LIMITER_WAITING = Gauge(
+    "db_limiter_waiting",
+    "Sessions queued for a database concurrency permit",
+    multiprocess_mode="livesum",
+)
+DB_LIMITER_REJECTED = Counter(
+    "db_limiter_rejected",
+    "Sessions rejected because the database concurrency queue was full",
+)
+DB_COALESCED_READS = Counter(
+    "db_coalesced_reads",
+    "Reads served by an identical read already in flight",
+)
+
+
+def instrument_pool(engine: AsyncEngine, name: str) -> None:
+    """
+    Keep the gauges of the engine pool, labeled with name, up to date on
+    every checkout and checkin. Only queue pools, the default, keep counts.
+    """
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, QueuePool):
+        return
+
+    checked_out = DB_POOL_CHECKED_OUT.labels(pool=name)
+    overflow = DB_POOL_OVERFLOW.labels(pool=name)
+
+    def update(*args) -> None:
+        checked_out.set(pool.checkedout())
+        overflow.set(max(pool.overflow(), 0))
+
+    event.listen(pool, "checkout", update)
+    event.listen(pool, "checkin", update)
+
+
+def latest() -> tuple[bytes, str]:
+    """
+    The exposition of all metrics, aggregated across workers in multiprocess
+    mode, and its content type.
+    """
+    if MULTIPROCESS:
+        collector_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collector_registry)
+    else:
+        collector_registry = registry.REGISTRY
+
+    return generate_latest(collector_registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int | None = None) -> None:
+    """
+    Drop the live gauges of the worker process pid, this one by default,
+    from the multiprocess aggregate, so gauges of exited workers no longer
+    count; the lifespan shutdown calls it for its own worker. Gunicorn
+    deployments should also call it from the child_exit server hook, which
+    covers workers that exit without a lifespan shutdown, in
+    gunicorn.conf.py:
+
+        def child_exit(server, worker):
+            from api.metrics import mark_process_dead
+
+            mark_process_dead(worker.pid)
+    """
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -0,0 +1,179 @@
+import math
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from api.configuration import DB_LOG
+from api.configuration import DB_PRIMARY_STICKY_SECONDS
+from api.lifecycle import Lifecycle
+from api.metrics import REQUEST_LATENCY
+from api.metrics import REQUESTS_IN_FLIGHT
+from api.repositories.base import SessionManager
+from api.repositories.base import db_context
+from api.repositories.base import get_replicas
+from api.repositories.instrumentation import log_request_stats
+
+
+class DBContextMiddleware:
+    """
+    Set a SessionManager as the DB context of every HTTP request and close
+    it once the response is sent.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware: requests run in
+    the middleware's own task, and requests that never touch the database,
+    e.g. health checks, skip the stats header and logs altogether.
+
+    With read replicas, a client that writes gets a cookie keeping its reads
+    on the primary for DB_PRIMARY_STICKY_SECONDS, so it reads its own writes
+    despite replication lag.
+    """
+
+    primary_cookie = "db_primary_until"
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        db = SessionManager(primary_only=self._is_sticky(scope))
+
+        async def send_with_stats(message: Message) -> None:
+            if message["type"] == "http.response.start" and db.stats:
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", db.stats.server_timing())
+                if db.wrote and get_replicas():
+                    headers.append("Set-Cookie", self._sticky_cookie())
+            await send(message)
+
+        token = db_context.set(db)
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            db_context.reset(token)
+            await db.close()
+
+        if db.stats and (DB_LOG or db.stats.repeated_statements()):
+            log_request_stats(scope["method"], scope["path"], db.stats)
+
+    def _is_sticky(self, scope: Scope) -> bool:
+        if not get_replicas():
+            return False
+
+        value = HTTPConnection(scope).cookies.get(self.primary_cookie)
+        try:
+            return value is not None and float(value) > time.time()
+        except ValueError:
+            return False
+
+    def _sticky_cookie(self) -> str:
+        until = time.time() + DB_PRIMARY_STICKY_SECONDS
+        return (
+            f"{self.primary_cookie}={until:.3f}; "
+            f"Max-Age={math.ceil(DB_PRIMARY_STICKY_SECONDS)}; "
+            "Path=/; HttpOnly; SameSite=Lax"
+        )
+
+
+class DrainMiddleware:
+    """
+    Track the HTTP requests in flight and, once the worker drains for
+    shutdown, refuse new ones with 503 and Connection: close, so clients
+    retry on another worker.
+    """
+
+    def __init__(self, app: ASGIApp, lifecycle: Lifecycle) -> None:
+        self.app = app
+        self.lifecycle = lifecycle
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self.lifecycle.draining:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 503,
+                    "headers": [
+                        (b"connection", b"close"),
+                        (b"retry-after", b"1"),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        self.lifecycle.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.lifecycle.request_finished()
+
+
+class MetricsMiddleware:
+    """
+    Record the latency and the in flight count of every HTTP request, by
+    route and status.
+
+    A request ends with the last body message of its response rather than
+    with its headers, so streamed responses, e.g. exports and the change
+    feed, count for their whole duration.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        finished = False
+
+        def finish() -> None:
+            nonlocal finished
+            if finished:
+                return
+
+            finished = True
+            REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=route.path if route is not None else "unmatched",
+                status=status,
+            ).observe(time.perf_counter() - start)
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                finish()
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            finish()
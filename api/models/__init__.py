@@ -1,4 +1,5 @@
-from models.portfolio import PortfolioModel
-from models.user import UserModel
+from api.models.portfolio import PortfolioModel
+from api.models.stats_counter import StatsCounterModel
+from api.models.user import UserModel
 
-__all__ = ["UserModel", "PortfolioModel"]
+__all__ = ["UserModel", "PortfolioModel", "StatsCounterModel"]
@@ -0,0 +1,29 @@
+from typing import TYPE_CHECKING
+from typing import ClassVar
+from uuid import UUID
+
+from sqlalchemy import Table
+from sqlmodel import SQLModel
+
+
+class TableModel(SQLModel):
+    """
+    Base of the table models, declaring for type checkers the table
+    SQLAlchemy maps a model to.
+    """
+
+    __table__: ClassVar[Table]
+
+
+class EntityModel(TableModel):
+    """
+    Base of the table models the repositories read and write, keyed by a
+    UUID id and moved to their next version by every update.
+
+    Declares the id and version fields for type checkers only: every model
+    defines them itself, so its columns keep their order.
+    """
+
+    if TYPE_CHECKING:
+        id: UUID | None
+        version: int | None
@@ -9,7 +9,7 @@ from sqlmodel import Field
 def str_enum_field_factory(
     enum_type: Type[Enum],
     values: list[Any] | None = None,
-    max_length: str | None = None,
+    max_length: int | None = None,
 ) -> Field:  # type: ignore
     if values is None:
         values = [member.value for member in enum_type]
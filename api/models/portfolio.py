@@ -1,33 +1,48 @@
+from datetime import datetime
 from typing import TYPE_CHECKING
 from uuid import UUID
 
+from sqlalchemy import DateTime
+from sqlalchemy import Index
 from sqlalchemy import text
 from sqlmodel import Field
 from sqlmodel import Relationship
-from sqlmodel import SQLModel
 
-from enums.portfolio_type import PortfolioType
-from models.fields import StrEnumField
-from schemas.portfolio import PortfolioUpdateModel
+from api.enums.portfolio_type import PortfolioType
+from api.models.base import EntityModel
+from api.models.fields import StrEnumField
+from api.schemas.portfolio import PortfolioUpdateModel
 
 if TYPE_CHECKING:
-    from models.user import UserModel
+    from api.models.user import UserModel
 
 
-class PortfolioModel(SQLModel, table=True):
+class PortfolioModel(EntityModel, table=True):
     __tablename__ = "portfolios"
+    __table_args__ = (
+        Index("ix_portfolios_user_id", "user_id", "id"),
+        Index("ix_portfolios_type", "type", "id"),
+    )
 
     id: UUID | None = Field(
         default=None,
         primary_key=True,
         sa_column_kwargs={
             "server_default": text("gen_random_uuid()"),
-            "unique": True,
             "nullable": False,
         },
     )
     type: PortfolioType = StrEnumField(PortfolioType, max_length=16)
     user_id: UUID = Field(default=None, foreign_key="users.id")
+    version: int | None = Field(
+        default=None,
+        sa_column_kwargs={"server_default": text("1"), "nullable": False},
+    )
+    updated_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": text("now()"), "nullable": False},
+    )
 
     user: "UserModel" = Relationship(
         back_populates="portfolios",
@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger
+from sqlmodel import Field
+
+from api.models.base import TableModel
+
+
+class StatsCounterModel(TableModel, table=True):
+    """
+    A row count of users or portfolios for one key of a dimension, e.g. the
+    users on the gold plan. Kept up to date by the triggers of the users and
+    portfolios tables, see the stats_counters migration.
+    """
+
+    __tablename__ = "stats_counters"
+
+    dimension: str = Field(primary_key=True, max_length=32)
+    key: str = Field(primary_key=True, max_length=64)
+    count: int = Field(default=0, sa_type=BigInteger)
@@ -1,35 +1,47 @@
+from datetime import datetime
 from typing import TYPE_CHECKING
 from uuid import UUID
 
+from sqlalchemy import DateTime
+from sqlalchemy import Index
 from sqlalchemy import text
 from sqlmodel import Field
 from sqlmodel import Relationship
-from sqlmodel import SQLModel
 
-from enums.subscription_plan import SubscriptionPlan
-from models.fields import StrEnumField
-from schemas.user import UserUpdateModel
+from api.enums.subscription_plan import SubscriptionPlan
+from api.models.base import EntityModel
+from api.models.fields import StrEnumField
+from api.schemas.user import UserUpdateModel
 
 if TYPE_CHECKING:
-    from models.portfolio import PortfolioModel
+    from api.models.portfolio import PortfolioModel
 
 
-class UserModel(SQLModel, table=True):
+class UserModel(EntityModel, table=True):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_plan", "plan", "id"),)
 
     id: UUID | None = Field(
         default=None,
         primary_key=True,
         sa_column_kwargs={
             "server_default": text("gen_random_uuid()"),
-            "unique": True,
             "nullable": False,
         },
     )
     name: str
     surname: str
-    email: str
+    email: str = Field(unique=True)
     plan: SubscriptionPlan = StrEnumField(SubscriptionPlan, max_length=16)
+    version: int | None = Field(
+        default=None,
+        sa_column_kwargs={"server_default": text("1"), "nullable": False},
+    )
+    updated_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": text("now()"), "nullable": False},
+    )
 
     portfolios: list["PortfolioModel"] = Relationship(
         back_populates="user",
@@ -1,49 +1,239 @@
-from asyncio import Semaphore
+import time
 from contextlib import asynccontextmanager
 from contextvars import ContextVar
 from functools import cached_property
-from functools import wraps
-from multiprocessing import cpu_count
+from functools import lru_cache
+from typing import Any
 from typing import AsyncGenerator
+from typing import Awaitable
 from typing import Callable
-from typing import ParamSpec
+from typing import Generic
+from typing import Sequence
 from typing import Type
 from typing import TypeVar
+from uuid import UUID
+from uuid import uuid4
 
+from pydantic import BaseModel
+from sqlalchemy import Column
+from sqlalchemy import Executable
+from sqlalchemy import Integer
+from sqlalchemy import Result
+from sqlalchemy import Row
+from sqlalchemy import RowMapping
+from sqlalchemy import Table
+from sqlalchemy import Values
+from sqlalchemy import bindparam
+from sqlalchemy import column
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy import values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.sql import Select as _Select
+from sqlalchemy.sql.roles import ColumnsClauseRole
 from sqlmodel import SQLModel
+from sqlmodel import col
 
-from configuration import DB_LOG
-from configuration import DB_URL
-from logger import logger
+from api.configuration import DB_MAX_OVERFLOW
+from api.configuration import DB_POOL_SIZE
+from api.configuration import DB_POOL_TIMEOUT
+from api.configuration import DB_PREPARED_STATEMENT_CACHE_SIZE
+from api.configuration import DB_QUERY_CACHE_SIZE
+from api.configuration import DB_REPLICA_EJECT_SECONDS
+from api.configuration import DB_REPLICA_URLS
+from api.configuration import DB_URL
+from api.configuration import EXPORT_BATCH_SIZE
+from api.configuration import PAGE_SIZE_DEFAULT
+from api.enums.change_operation import ChangeOperation
+from api.enums.change_table import ChangeTable
+from api.metrics import instrument_pool
+from api.models.base import EntityModel
+from api.repositories.cache import Cache
+from api.repositories.cache import entity_cache
+from api.repositories.change_feed import notify
+from api.repositories.instrumentation import RequestStats
+from api.repositories.instrumentation import checkout_connection
+from api.repositories.instrumentation import instrument_engine
+from api.repositories.instrumentation import record_limiter_wait
+from api.repositories.instrumentation import request_stats
+from api.repositories.limiter import ConcurrencyLimiter
+from api.repositories.limiter import db_limiter
+from api.repositories.pagination import decode_cursor
+from api.repositories.pagination import encode_cursor
+from api.repositories.replicas import ReplicaSet
+from api.repositories.replicas import is_connection_error
+from api.repositories.singleflight import SingleFlight
+from api.repositories.singleflight import db_single_flight
+from api.schemas.batch import BatchError
+from api.schemas.batch import BatchResult
+from api.schemas.change import ChangeEvent
 
 T = TypeVar("T")
-P = ParamSpec("P")
-
-engine = create_async_engine(
-    url=f"postgresql+asyncpg://{DB_URL}",
-    pool_size=cpu_count() * 2,
-    max_overflow=cpu_count(),
-    pool_timeout=30,
-    pool_recycle=60 * 15,
-)
+ModelT = TypeVar("ModelT", bound=EntityModel)
+
+
+class VersionMismatchError(Exception):
+    """
+    A conditional write found its row at a version it was not made for.
+    """
+
+
+def engine_factory(url: str, name: str) -> AsyncEngine:
+    engine = create_async_engine(
+        url=f"postgresql+asyncpg://{url}",
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=60 * 15,
+        query_cache_size=DB_QUERY_CACHE_SIZE,
+        connect_args={
+            "prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE
+        },
+    )
+    instrument_engine(engine)
+    instrument_pool(engine, name)
+
+    return engine
+
+
+@lru_cache(maxsize=None)
+def get_engine() -> AsyncEngine:
+    """
+    The engine of the primary, created on first use rather than on import,
+    so importing the app or a repository opens no pool.
+    """
+    return engine_factory(DB_URL, "primary")
+
+
+@lru_cache(maxsize=None)
+def get_replicas() -> ReplicaSet:
+    """
+    The engines of the read replicas, created on first use.
+    """
+    return ReplicaSet(
+        [
+            engine_factory(url, f"replica-{index}")
+            for index, url in enumerate(DB_REPLICA_URLS)
+        ],
+        eject_seconds=DB_REPLICA_EJECT_SECONDS,
+    )
+
 
-# Increase semaphore capacity based on DB service resources.
-# Semaphore capacity is related to concurrent requests arriving at the database.
-# Raising it too high may overwhelm the DB causing timeouts. Typically, a value between 50-100 is sufficient for high efficiency.
-# Larger values are generally unnecessary unless if you know how to configure a proper setup.
-acquire_connection_semaphore = Semaphore(50)
+# asyncpg caps the number of bind parameters of a single statement
+BIND_PARAMS_MAX = 32_767
 
 
 class SessionManager:
+    """
+    Database resources of a unit of work, e.g. an HTTP request.
+
+    Creating a SessionManager is free: sessions are created on first
+    access and the concurrency permit on their first statement, so units of
+    work that never query the database add no database overhead.
+
+    Reads go through read_session, bound to a read replica when replicas
+    are configured, and writes through session, bound to the primary. Once
+    the unit of work writes, or when created with primary_only, reads go to
+    the primary too so they see the writes.
+    """
+
+    def __init__(
+        self,
+        limiter: ConcurrencyLimiter = db_limiter,
+        primary_only: bool = False,
+    ) -> None:
+        self.limiter = limiter
+        self.has_permit = False
+        self.stats: RequestStats | None = None
+        self.primary_only = primary_only
+        self.wrote = False
+        self.retired_sessions: list[AsyncSession] = []
+
     @cached_property
     def session(self) -> AsyncSession:
-        return AsyncSession(engine)
+        return AsyncSession(get_engine(), info={"db": self})
+
+    @cached_property
+    def read_session(self) -> AsyncSession:
+        replica = None if self.primary_only else get_replicas().choose()
+        if replica is None:
+            return self.session
+
+        return AsyncSession(replica, info={"db": self, "replica": replica})
+
+    def mark_write(self) -> None:
+        """
+        Send the reads of the unit of work to the primary from now on. The
+        replica session they used is closed with the SessionManager, as a
+        read may still be running on it.
+        """
+        self.wrote = True
+        self.primary_only = True
+        read_session = self.__dict__.get("read_session")
+        if read_session is not None and read_session is not self.session:
+            del self.__dict__["read_session"]
+            self.retired_sessions.append(read_session)
+
+    async def read_failed(
+        self, session: AsyncSession, exp: Exception
+    ) -> AsyncSession | None:
+        """
+        Handle a failed read: when session reads from a replica that could
+        not be reached, eject the replica, close session and return the
+        session to retry the read on.
+        """
+        replica = session.info.get("replica")
+        if replica is None or not is_connection_error(exp):
+            return None
+
+        get_replicas().eject(replica)
+        if self.__dict__.get("read_session") is session:
+            del self.__dict__["read_session"]
+        await session.close()
+        return self.read_session
+
+    async def acquire(self) -> None:
+        """
+        Acquire a database concurrency permit, held until close.
+        """
+        if self.has_permit:
+            return
+
+        self.record_stats()
+        start = time.perf_counter()
+        await self.limiter.acquire()
+        self.has_permit = True
+        record_limiter_wait(time.perf_counter() - start)
+
+    def record_stats(self) -> RequestStats:
+        """
+        The stats of the unit of work, recording its statements from now on.
+        """
+        if self.stats is None:
+            self.stats = RequestStats()
+            request_stats.set(self.stats)
+
+        return self.stats
 
     async def close(self) -> None:
-        await self.session.close()
+        try:
+            for retired in self.retired_sessions:
+                await retired.close()
+            read_session = self.__dict__.get("read_session")
+            if read_session is not None and read_session is not self.session:
+                await read_session.close()
+            if "session" in self.__dict__:
+                await self.session.close()
+        finally:
+            if self.has_permit:
+                self.has_permit = False
+                self.limiter.release()
 
     @staticmethod
     def new_session() -> AsyncSession:
@@ -56,34 +246,72 @@ db_context: ContextVar[SessionManager | None] = ContextVar(
 )
 
 
-def get_context_session() -> AsyncSession:
+def get_context_db() -> SessionManager:
     db = db_context.get()
     if db is None:
         raise Exception(
-            "DB context not set, run: "
-            "from repositories.base import SessionManager, db_context; "
+            "DB context not set, run from the repository root: "
+            "from api.repositories.base import SessionManager, db_context; "
             "db = SessionManager(); "
             "db_context.set(db)"
         )
 
-    return db.session
+    return db
+
+
+def get_context_session() -> AsyncSession:
+    return get_context_db().session
+
+
+def get_context_read_session() -> AsyncSession:
+    return get_context_db().read_session
+
+
+async def connect(session: AsyncSession) -> None:
+    """
+    Prepare the session to run a statement: acquire the concurrency permit
+    of its SessionManager, only once the session is actually used, and
+    check out its connection.
+    """
+    db = session.info.get("db")
+    if db is not None:
+        await db.acquire()
+
+    await checkout_connection(session)
 
 
 @asynccontextmanager
 async def new_db_instance() -> AsyncGenerator[SessionManager, None]:
-    async with acquire_connection_semaphore:
-        try:
-            db = SessionManager()
-            yield db
-        finally:
-            await db.close()
+    db = SessionManager()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def read_in_new_db(
+    primary_only: bool,
+    read: Callable[..., Awaitable[T]],
+    params: dict[str, Any],
+) -> tuple[T, RequestStats | None]:
+    """
+    Run read on a database context of its own, returning its result and
+    the stats of its statements, None when it ran none.
+    """
+    async with new_db_instance() as db:
+        db.primary_only = primary_only
+        db_context.set(db)
+        return await read(**params), db.stats
 
 
 @asynccontextmanager
 async def managed_session() -> AsyncGenerator[AsyncSession, None]:
-    session = get_context_session()
+    db = get_context_db()
+    db.mark_write()
+    session = db.session
 
     try:
+        await connect(session)
         yield session
     except Exception as exp:
         await session.rollback()
@@ -95,92 +323,721 @@ async def managed_session() -> AsyncGenerator[AsyncSession, None]:
 class Select(_Select):
     """
     Enhanced Select class with session management.
+
+    A Select holds no per-request state: its session is resolved each time
+    it runs and its values may be bind parameters passed at execution, so a
+    statement can be built once and reused, keeping its memoized cache key
+    and its compiled form from the engine compiled cache.
     """
 
     inherit_cache = True
 
     def __init__(
         self,
-        orm_model: SQLModel,
-        *entities: SQLModel,
-        session: AsyncSession,
+        orm_model: Type[SQLModel] | ColumnsClauseRole,
+        *entities: Type[SQLModel] | ColumnsClauseRole,
+        session_getter: Callable[[], AsyncSession],
     ) -> None:
         """
-        orm_model: SQLModel, The primary model for the select operation.
-        *entities: SQLModel, Additional entities to include in the select.
-        session: Session | None, The session to use. If None, a new session is generated.
+        orm_model: Type[SQLModel] | ColumnsClauseRole, The primary model,
+            table or column for the select operation.
+        *entities: Type[SQLModel] | ColumnsClauseRole, Additional entities to
+            include in the select.
+        session_getter: Callable[[], AsyncSession], Returns the session to
+            run the statement on.
         """
         super().__init__(orm_model, *entities)
 
         self.orm_model = orm_model
-        self.session = session
-
-    @staticmethod
-    def _query_logger(func: Callable[..., T]) -> Callable[..., T]:
-        """Decorator to log queries if DB_LOG is enabled."""
-
-        @wraps(func)
-        def wrapper(self, *args: P.args, **kwargs: P.kwargs) -> T:
-            if DB_LOG:
-                logger.info(self)
-            return func(self, *args, **kwargs)
-
-        return wrapper
+        self.session_getter = session_getter
 
     @asynccontextmanager
-    async def _managed_session(self):
+    async def _managed_session(self, session: AsyncSession):
         try:
-            yield self.session
+            await connect(session)
+            yield session
         except Exception as exp:
-            await self.session.rollback()
+            await session.rollback()
             raise exp
 
-    @_query_logger
-    async def one_or_none(self) -> SQLModel | None:
-        async with self._managed_session() as session:
-            row = (
-                (await session.execute(statement=self)).scalars().one_or_none()
-            )
+    async def _execute(self, params: dict[str, Any]) -> Result:
+        """
+        Execute the statement with the bind parameter values params,
+        retrying once when the read replica of the session cannot be
+        reached, see SessionManager.read_failed.
+        """
+        session = self.session_getter()
+        try:
+            async with self._managed_session(session):
+                return await session.execute(self, params)
+        except Exception as exp:
+            db = session.info.get("db")
+            retry = None if db is None else await db.read_failed(session, exp)
+            if retry is None:
+                raise
 
-            if row is None:
-                return None
+        async with self._managed_session(retry):
+            return await retry.execute(self, params)
 
-            return row
+    async def one_or_none(self, **params: Any) -> Any | None:
+        return (await self._execute(params)).scalars().one_or_none()
 
-    @_query_logger
-    async def one(self) -> SQLModel:
-        async with self._managed_session() as session:
-            return (await session.execute(statement=self)).scalars().one()
+    async def one(self, **params: Any) -> Any:
+        return (await self._execute(params)).scalars().one()
 
-    @_query_logger
-    async def all(self) -> list[SQLModel]:
-        async with self._managed_session() as session:
-            return (await session.execute(statement=self)).scalars().all()
+    async def all(self, **params: Any) -> list[Any]:
+        return list((await self._execute(params)).scalars().all())
 
-    @_query_logger
-    async def first(self) -> SQLModel:
-        async with self._managed_session() as session:
-            return (await session.execute(statement=self)).scalars().first()
+    async def first(self, **params: Any) -> Any | None:
+        return (await self._execute(params)).scalars().first()
 
+    async def mappings(self, **params: Any) -> list[RowMapping]:
+        """
+        All result rows as plain row mappings, skipping ORM hydration; select
+        the table rather than the model to get column values.
+        """
+        return list((await self._execute(params)).mappings().all())
 
-class BaseRepository:
-    orm_model: Type[SQLModel]
-    session_getter: Callable[[], AsyncSession] = get_context_session
+    async def rows(self, **params: Any) -> list[Row]:
+        """
+        All result rows as plain tuples, for statements selecting columns or
+        expressions rather than ORM entities.
+        """
+        return list((await self._execute(params)).all())
+
+    async def partitions(
+        self, size: int, **params: Any
+    ) -> AsyncGenerator[list[RowMapping], None]:
+        """
+        Stream the result through a server-side cursor, yielding lists of
+        at most size row mappings, so only one batch is held in memory.
+        """
+        session = self.session_getter()
+        async with self._managed_session(session):
+            result = await session.stream(
+                self.execution_options(yield_per=size), params
+            )
+            async for partition in result.mappings().partitions(size):
+                yield list(partition)
+
+
+class BaseRepository(Generic[ModelT]):
+    orm_model: Type[ModelT]
+    filter_fields: tuple[str, ...] = ()
+    session_getter: Callable[[], AsyncSession] = get_context_read_session
+    cache: Cache | None = entity_cache
+    single_flight: SingleFlight | None = db_single_flight
+    # The change feed table of the rows written, None to publish no changes,
+    # and the column holding the user owning a row
+    change_table: ChangeTable | None = None
+    owner_column: str | None = None
 
     @classmethod
     def select(
         cls,
-        orm_model: Type[SQLModel],
-        *entities: Type[SQLModel],
+        orm_model: Type[SQLModel] | ColumnsClauseRole,
+        *entities: Type[SQLModel] | ColumnsClauseRole,
     ) -> Select:
         """
         Create a Select instance for the given ORM model and entities.
 
-        orm_model: Type[SQLModel], The primary model for the select operation.
-        *entities: Type[SQLModel], Additional entities to include in the select.
+        orm_model: Type[SQLModel] | ColumnsClauseRole, The primary model,
+            table or column for the select operation.
+        *entities: Type[SQLModel] | ColumnsClauseRole, Additional entities to
+            include in the select.
         """
         return Select(
             orm_model,
             *entities,
-            session=cls.session_getter(),
+            session_getter=cls.session_getter,
+        )
+
+    @classmethod
+    async def coalesced(
+        cls, statement: Select, method: str, **params: Any
+    ) -> Any:
+        """
+        Run the read statement with the bind parameter values params and
+        return the result of its method, e.g. "all", sharing one query
+        among identical concurrent reads of the worker, see SingleFlight.
+
+        The shared query runs on a database context of its own, as it may
+        outlive the request that started it, and each caller records its
+        stats as coalesced queries. The result is shared too, so callers
+        must not modify it.
+        """
+        read = getattr(statement, method)
+        if cls.single_flight is None:
+            return await read(**params)
+
+        db = get_context_db()
+        primary_only = db.primary_only
+        result, stats = await cls.single_flight.do(
+            (statement, method, primary_only, *sorted(params.items())),
+            lambda: read_in_new_db(primary_only, read, params),
+        )
+        if stats is not None:
+            db.record_stats().add_coalesced(stats)
+
+        return result
+
+    @classmethod
+    def cache_key(cls, id: UUID) -> str:
+        return f"{cls.orm_model.__tablename__}:{id}"
+
+    @classmethod
+    async def cache_refresh(cls, row: ModelT) -> None:
+        if cls.cache is not None:
+            data = row.model_dump()
+            await cls.cache.set(cls.cache_key(data["id"]), data)
+
+    @classmethod
+    async def cache_invalidate(cls, id: UUID) -> None:
+        if cls.cache is not None:
+            await cls.cache.delete(cls.cache_key(id))
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def get_statement(cls) -> Select:
+        return cls.select(cls.orm_model).where(
+            col(cls.orm_model.id) == bindparam("id")
+        )
+
+    @classmethod
+    async def get(cls, id: UUID, cached: bool = True) -> ModelT | None:
+        """
+        Fetch a row by primary key, reading through the entity cache.
+
+        Cached rows are rebuilt detached from any session, so callers that
+        modify the returned object must pass cached=False. Units of work
+        reading from the primary, e.g. those of a client that just wrote,
+        skip the cache as it may hold a row another worker has since
+        updated, and refresh it with the row read.
+
+        id: UUID, The primary key of the row.
+        cached: bool, Whether the entity cache may serve the row.
+        """
+        if (
+            cached
+            and cls.cache is not None
+            and not get_context_db().primary_only
+        ):
+            data = await cls.cache.get(cls.cache_key(id))
+            if data is not None:
+                return cls.orm_model.model_validate(data)
+
+        if not cached:
+            return await cls.get_statement().one_or_none(id=id)
+
+        row = await cls.coalesced(cls.get_statement(), "one_or_none", id=id)
+        if row is not None:
+            await cls.cache_refresh(row)
+
+        return row
+
+    @classmethod
+    def filter_values(cls, **filters: Any) -> dict[str, Any]:
+        """
+        The filters in use, those whose value is not None, raising
+        ValueError for columns not listed in filter_fields.
+
+        **filters: Any, Column name to value mapping.
+        """
+        for name in filters:
+            if name not in cls.filter_fields:
+                raise ValueError(
+                    f"{cls.__name__} does not support filtering on {name}"
+                )
+
+        return {
+            name: value for name, value in filters.items() if value is not None
+        }
+
+    @classmethod
+    def filtered(cls, statement: Select, **filters: Any) -> Select:
+        """
+        Apply equality filters on the columns listed in filter_fields,
+        skipping filters whose value is None.
+
+        statement: Select, The statement to filter.
+        **filters: Any, Column name to value mapping.
+        """
+        for name, value in cls.filter_values(**filters).items():
+            statement = statement.where(getattr(cls.orm_model, name) == value)
+
+        return statement
+
+    @classmethod
+    def hot_statements(cls) -> list[tuple[Select, dict[str, Any]]]:
+        """
+        The statements worth preparing on every pooled connection at
+        startup, with placeholder parameter values, see repositories.warmup.
+        """
+        id, limit = uuid4(), 1
+        return [
+            (cls.get_statement(), {"id": id}),
+            *[
+                (
+                    cls.rows_page_statement(None, names),
+                    params | {"limit": limit},
+                )
+                for names, params in (((), {}), (("cursor",), {"cursor": id}))
+            ],
+        ]
+
+    @classmethod
+    def page_params(
+        cls, limit: int, cursor: str | None = None, **filters: Any
+    ) -> tuple[tuple[str, ...], dict[str, Any]]:
+        """
+        The bind parameters of a page statement, see paginated: the names of
+        the filters in use and of the cursor if any, and the values of all.
+        """
+        params = cls.filter_values(**filters)
+        if cursor is not None:
+            params["cursor"] = decode_cursor(cursor)
+
+        return tuple(sorted(params)), params | {"limit": limit}
+
+    @classmethod
+    def paginated(cls, statement: Select, names: tuple[str, ...]) -> Select:
+        """
+        Restrict the statement to a page of rows following the cursor in
+        primary key order, filtered on the columns in names. The filter
+        values, the cursor and the page size are bind parameters, so the
+        statement is built once per combination of names, see page_params.
+        """
+        for name in names:
+            if name == "cursor":
+                statement = statement.where(
+                    col(cls.orm_model.id) > bindparam("cursor")
+                )
+            else:
+                statement = statement.where(
+                    getattr(cls.orm_model, name) == bindparam(name)
+                )
+
+        return statement.order_by(col(cls.orm_model.id)).limit(
+            bindparam("limit", type_=Integer)
+        )
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def page_statement(
+        cls, entity: Type[SQLModel] | ColumnsClauseRole, names: tuple[str, ...]
+    ) -> Select:
+        return cls.paginated(cls.select(entity), names)
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def rows_page_statement(
+        cls, fields: tuple[str, ...] | None, names: tuple[str, ...]
+    ) -> Select:
+        """
+        The page statement of page_rows, selecting only the table columns
+        in fields, or all of them when None, see repositories.fields.
+        """
+        table = cls.orm_model.__table__
+        if fields is None:
+            return cls.page_statement(table, names)
+
+        columns = [table.columns[name] for name in fields]
+        return cls.paginated(cls.select(*columns), names)
+
+    @classmethod
+    async def page_rows(
+        cls,
+        limit: int = PAGE_SIZE_DEFAULT,
+        cursor: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        **filters: Any,
+    ) -> dict[str, Any]:
+        """
+        Same as page, as a plain dict holding row mappings instead of model
+        instances, for responses rendered without validation, see
+        endpoints.responses.RowsResponse.
+
+        fields: tuple[str, ...] | None, The columns to select, all when None,
+            see repositories.fields.parse_fields.
+        """
+        names, params = cls.page_params(limit + 1, cursor, **filters)
+        rows = await cls.coalesced(
+            cls.rows_page_statement(fields, names),
+            "mappings",
+            **params,
+        )
+        if len(rows) <= limit:
+            return {"items": rows, "next_cursor": None}
+
+        rows = rows[:limit]
+        return {"items": rows, "next_cursor": encode_cursor(rows[-1]["id"])}
+
+    @classmethod
+    async def stream(
+        cls,
+        batch_size: int = EXPORT_BATCH_SIZE,
+        **filters: Any,
+    ) -> AsyncGenerator[list[RowMapping], None]:
+        """
+        Stream every row of the table as plain row mappings, in batches.
+
+        The stream runs on the context read session: the DB context
+        middleware closes it only once a streamed response is sent, so an
+        export holds a single concurrency permit and its statements count
+        in the stats of its request.
+
+        batch_size: int, The number of rows fetched per round-trip.
+        **filters: Any, Equality filters, see filtered.
+        """
+        statement = cls.filtered(
+            Select(cls.orm_model.__table__, session_getter=cls.session_getter),
+            **filters,
+        )
+        async for batch in statement.partitions(batch_size):
+            yield batch
+
+    @classmethod
+    async def publish(
+        cls,
+        session: AsyncSession,
+        operation: ChangeOperation,
+        rows: Sequence[ModelT],
+    ) -> None:
+        """
+        Publish the changes of rows to the change feed, in the transaction
+        of session, see repositories.change_feed.
+        """
+        if cls.change_table is None or not rows:
+            return
+
+        statement, params = notify(
+            [
+                ChangeEvent.model_validate(
+                    {
+                        "table": cls.change_table,
+                        "operation": operation,
+                        "id": row.id,
+                        "user_id": (
+                            getattr(row, cls.owner_column)
+                            if cls.owner_column is not None
+                            else None
+                        ),
+                        "version": row.version,
+                    }
+                )
+                for row in rows
+            ]
+        )
+        await session.execute(statement, params)
+
+    @classmethod
+    async def _execute_returning(
+        cls, statement: Executable, operation: ChangeOperation
+    ) -> ModelT | None:
+        async with managed_session() as session:
+            mapping = (
+                (await session.execute(statement)).mappings().one_or_none()
+            )
+            row = (
+                None
+                if mapping is None
+                else cls.orm_model.model_validate(mapping)
+            )
+            if row is not None:
+                await cls.publish(session, operation, [row])
+            await session.commit()
+
+        return row
+
+    @classmethod
+    def version_values(cls) -> dict[str, Any]:
+        """
+        The values every UPDATE sets besides the data, to move the row to
+        its next version.
+        """
+        table = cls.orm_model.__table__
+        return {"version": table.c.version + 1, "updated_at": func.now()}
+
+    @classmethod
+    async def _check_version(cls, id: UUID, versions: list[int] | None) -> None:
+        """
+        Tell apart a conditional write that missed because the row does not
+        exist from one that missed because the row is at another version.
+        """
+        if versions is not None and await cls.get(id, cached=False):
+            raise VersionMismatchError(f"{id} is not at version {versions}")
+
+    @classmethod
+    async def update_returning(
+        cls, id: UUID, update_data: BaseModel, versions: list[int] | None = None
+    ) -> ModelT | None:
+        """
+        Update a row by primary key with a single UPDATE ... RETURNING,
+        setting only the fields of update_data that are not None and
+        moving the row to its next version.
+
+        id: UUID, The primary key of the row.
+        update_data: BaseModel, The update model.
+        versions: list[int] | None, Only update the row at one of these
+            versions, or raise VersionMismatchError.
+        """
+        data = update_data.model_dump(exclude_none=True)
+        if not data:
+            row = await cls.get(id, cached=versions is None)
+            if row is not None and versions is not None:
+                if row.version not in versions:
+                    raise VersionMismatchError(
+                        f"{id} is not at version {versions}"
+                    )
+
+            return row
+
+        table = cls.orm_model.__table__
+        statement = update(table).where(table.c.id == id)
+        if versions is not None:
+            statement = statement.where(table.c.version.in_(versions))
+
+        row = await cls._execute_returning(
+            statement.values(data | cls.version_values()).returning(table),
+            ChangeOperation.UPDATED,
+        )
+        if row is None:
+            await cls._check_version(id, versions)
+        else:
+            await cls.cache_refresh(row)
+
+        return row
+
+    @classmethod
+    async def delete_returning(
+        cls, id: UUID, versions: list[int] | None = None
+    ) -> ModelT | None:
+        """
+        Delete a row by primary key with a single DELETE ... RETURNING.
+
+        id: UUID, The primary key of the row.
+        versions: list[int] | None, Only delete the row at one of these
+            versions, or raise VersionMismatchError.
+        """
+        table = cls.orm_model.__table__
+        statement = delete(table).where(table.c.id == id)
+        if versions is not None:
+            statement = statement.where(table.c.version.in_(versions))
+
+        row = await cls._execute_returning(
+            statement.returning(table), ChangeOperation.DELETED
+        )
+        await cls.cache_invalidate(id)
+        if row is None:
+            await cls._check_version(id, versions)
+
+        return row
+
+    @classmethod
+    def _batch_values(
+        cls, columns: list[Column], rows: list[dict[str, Any]]
+    ) -> Values:
+        return values(
+            *[column(c.name, c.type) for c in columns], name="batch"
+        ).data([tuple(row[c.name] for c in columns) for row in rows])
+
+    @staticmethod
+    def _chunks(rows: list[T], width: int) -> list[list[T]]:
+        size = max(BIND_PARAMS_MAX // width, 1)
+        return [rows[i : i + size] for i in range(0, len(rows), size)]
+
+    @classmethod
+    def insert_source(cls, batch: Values) -> _Select:
+        """
+        The select feeding insert_many; repositories may narrow it, e.g. to
+        skip rows violating a foreign key instead of failing the batch.
+        """
+        return select(batch)
+
+    @classmethod
+    def insert_error(cls, row: dict[str, Any]) -> str:
+        """
+        The error reported for a row insert_many did not insert.
+        """
+        return "Conflicts with an existing row"
+
+    @classmethod
+    async def insert_many(cls, items: Sequence[BaseModel]) -> BatchResult:
+        """
+        Insert all items in one transaction with multi-row
+        INSERT ... SELECT ... RETURNING statements, one per
+        BIND_PARAMS_MAX parameters.
+
+        Primary keys are generated client side so returned rows can be
+        matched to the items; items that were not inserted are reported as
+        errors instead of failing the whole batch.
+
+        items: Sequence[BaseModel], The create models of the rows to insert.
+        """
+        if not items:
+            return BatchResult(items=[])
+
+        table = cls.orm_model.__table__
+        rows = [{"id": uuid4(), **item.model_dump()} for item in items]
+        columns = [table.c[name] for name in rows[0]]
+
+        inserted = {}
+        async with managed_session() as session:
+            for chunk in cls._chunks(rows, len(columns)):
+                statement = (
+                    insert(table)
+                    .from_select(
+                        [c.name for c in columns],
+                        cls.insert_source(cls._batch_values(columns, chunk)),
+                    )
+                    .on_conflict_do_nothing()
+                    .returning(table)
+                )
+                for row in (await session.execute(statement)).mappings():
+                    inserted[row["id"]] = cls.orm_model.model_validate(row)
+            await cls.publish(
+                session, ChangeOperation.CREATED, list(inserted.values())
+            )
+            await session.commit()
+
+        return await cls._batch_result(rows, inserted, cls.insert_error)
+
+    @classmethod
+    def update_statement(
+        cls, columns: list[Column], rows: list[dict[str, Any]]
+    ) -> Executable:
+        """
+        The UPDATE ... FROM VALUES ... RETURNING statement of update_many
+        for rows. Fields set to None keep their value.
+        """
+        table = cls.orm_model.__table__
+        batch = cls._batch_values(columns, rows)
+        return (
+            update(table)
+            .where(table.c.id == batch.c.id)
+            .values(
+                {
+                    c.name: func.coalesce(batch.c[c.name], c)
+                    for c in columns
+                    if c.name != "id"
+                }
+                | cls.version_values()
+            )
+            .returning(table)
+        )
+
+    @classmethod
+    async def update_many(cls, items: Sequence[BaseModel]) -> BatchResult:
+        """
+        Update all items in one transaction with UPDATE ... FROM VALUES
+        ... RETURNING statements, one per BIND_PARAMS_MAX parameters.
+        Fields set to None keep their value. Items must have distinct
+        primary keys.
+
+        When an item conflicts, e.g. with the unique email of another row,
+        the batch is written again one item at a time, each in a savepoint,
+        so the items that conflict are reported as errors, like those not
+        found, instead of failing the whole batch.
+
+        items: Sequence[BaseModel], Update models carrying the primary key.
+        """
+        if not items:
+            return BatchResult(items=[])
+
+        table = cls.orm_model.__table__
+        rows = [item.model_dump() for item in items]
+        columns = [table.c[name] for name in rows[0]]
+
+        updated, conflicts = {}, set()
+        async with managed_session() as session:
+            try:
+                for chunk in cls._chunks(rows, len(columns)):
+                    statement = cls.update_statement(columns, chunk)
+                    for row in (await session.execute(statement)).mappings():
+                        updated[row["id"]] = cls.orm_model.model_validate(row)
+            except IntegrityError:
+                await session.rollback()
+                updated = {}
+                for item in rows:
+                    statement = cls.update_statement(columns, [item])
+                    try:
+                        async with session.begin_nested():
+                            result = await session.execute(statement)
+                            mapping = result.mappings().one_or_none()
+                    except IntegrityError:
+                        conflicts.add(item["id"])
+                        continue
+                    if mapping is not None:
+                        updated[mapping["id"]] = cls.orm_model.model_validate(
+                            mapping
+                        )
+
+            await cls.publish(
+                session, ChangeOperation.UPDATED, list(updated.values())
+            )
+            await session.commit()
+
+        return await cls._batch_result(
+            rows,
+            updated,
+            lambda row: (
+                "Conflicts with an existing row"
+                if row["id"] in conflicts
+                else "Not found"
+            ),
+        )
+
+    @classmethod
+    async def delete_many(cls, ids: list[UUID]) -> BatchResult:
+        """
+        Delete all rows by primary key in one transaction with
+        DELETE ... RETURNING statements.
+
+        ids: list[UUID], The primary keys of the rows to delete.
+        """
+        table = cls.orm_model.__table__
+        rows = [{"id": id} for id in ids]
+
+        deleted = {}
+        async with managed_session() as session:
+            for chunk in cls._chunks(ids, 1):
+                statement = (
+                    delete(table).where(table.c.id.in_(chunk)).returning(table)
+                )
+                for row in (await session.execute(statement)).mappings():
+                    deleted[row["id"]] = cls.orm_model.model_validate(row)
+            await cls.publish(
+                session, ChangeOperation.DELETED, list(deleted.values())
+            )
+            await session.commit()
+
+        for id in deleted:
+            await cls.cache_invalidate(id)
+
+        return BatchResult(
+            items=list(deleted.values()),
+            errors=[
+                BatchError(index=index, detail="Not found")
+                for index, row in enumerate(rows)
+                if row["id"] not in deleted
+            ],
+        )
+
+    @classmethod
+    async def _batch_result(
+        cls,
+        rows: list[dict[str, Any]],
+        written: dict[UUID, ModelT],
+        error: Callable[[dict[str, Any]], str],
+    ) -> BatchResult:
+        for row in written.values():
+            await cls.cache_refresh(row)
+
+        return BatchResult(
+            items=list(written.values()),
+            errors=[
+                BatchError(index=index, detail=error(row))
+                for index, row in enumerate(rows)
+                if row["id"] not in written
+            ],
         )
@@ -0,0 +1,178 @@
+import json
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict
+from dataclasses import dataclass
+from typing import Any
+
+from api.configuration import CACHE_BACKEND
+from api.configuration import CACHE_MAX_SIZE
+from api.configuration import CACHE_TTL
+from api.configuration import REDIS_URL
+from api.logger import logger
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class Cache(ABC):
+    """
+    Key-value cache of serialized entities, i.e. dicts produced by
+    SQLModel.model_dump().
+    """
+
+    def __init__(self) -> None:
+        self.stats = CacheStats()
+
+    @abstractmethod
+    async def get(self, key: str) -> dict[str, Any] | None:
+        """
+        The entry of key, None when missing or expired.
+        """
+
+    @abstractmethod
+    async def set(self, key: str, value: dict[str, Any]) -> None:
+        """
+        Store value as the entry of key.
+        """
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """
+        Drop the entry of key, if any.
+        """
+
+
+class LRUCache(Cache):
+    """
+    In-process cache evicting the least recently used entry once max_size
+    is reached, and entries older than ttl seconds on access.
+
+    Being per process, invalidations are not seen by other workers; ttl
+    bounds how long they may serve a stale entry. With more than one worker
+    use the Redis backend, which all workers share, unless reads up to ttl
+    seconds stale are acceptable.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = (
+            OrderedDict()
+        )
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class RedisCache(Cache):
+    """
+    Cache shared by all workers, backed by any client exposing the async
+    redis get/set/delete API, e.g. redis.asyncio.Redis.
+
+    The cache is best effort: when the client raises one of errors, e.g.
+    Redis is unreachable or times out, the error is counted and logged, a
+    get misses and falls through to the database, and a set or delete is
+    dropped, so a committed write still returns its response. An entry a
+    failed delete left behind expires after ttl seconds.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        ttl: float,
+        errors: tuple[type[Exception], ...] = (ConnectionError, TimeoutError),
+    ) -> None:
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.errors = errors
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        try:
+            value = await self.client.get(key)
+        except self.errors as exp:
+            self._failed("get", key, exp)
+            value = None
+
+        if value is None:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return json.loads(value)
+
+    async def set(self, key: str, value: dict[str, Any]) -> None:
+        try:
+            await self.client.set(
+                key, json.dumps(value, default=str), ex=max(int(self.ttl), 1)
+            )
+        except self.errors as exp:
+            self._failed("set", key, exp)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.client.delete(key)
+        except self.errors as exp:
+            self._failed("delete", key, exp)
+
+    def _failed(self, operation: str, key: str, exp: Exception) -> None:
+        self.stats.errors += 1
+        logger.warning(f"Cache {operation} of {key} failed: {exp!r}")
+
+
+def cache_factory() -> Cache | None:
+    if CACHE_BACKEND == "lru":
+        return LRUCache(max_size=CACHE_MAX_SIZE, ttl=CACHE_TTL)
+
+    if CACHE_BACKEND == "redis":
+        # Optional dependency, install with: poetry install -E cache
+        from redis import exceptions
+        from redis.asyncio import Redis
+
+        return RedisCache(
+            client=Redis.from_url(REDIS_URL),
+            ttl=CACHE_TTL,
+            errors=(exceptions.ConnectionError, exceptions.TimeoutError),
+        )
+
+    return None
+
+
+entity_cache = cache_factory()
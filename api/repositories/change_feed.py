@@ -0,0 +1,226 @@
+import asyncio
+from collections import defaultdict
+from uuid import UUID
+
+import asyncpg
+from pydantic import ValidationError
+from sqlalchemy import ARRAY
+from sqlalchemy import Text
+from sqlalchemy import bindparam
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+
+from api.configuration import CHANGE_FEED_CHANNEL
+from api.configuration import CHANGE_FEED_QUEUE_SIZE
+from api.configuration import CHANGE_FEED_RECONNECT_INTERVAL
+from api.configuration import DB_URL
+from api.enums.change_table import ChangeTable
+from api.logger import logger
+from api.schemas.change import ChangeEvent
+
+# Reasons a subscription is closed for, sent to the subscriber
+OVERFLOW = "overflow"
+RECONNECT = "reconnect"
+SHUTDOWN = "shutdown"
+
+# One notification per payload, in a single round trip
+notify_statement = select(
+    func.pg_notify(
+        CHANGE_FEED_CHANNEL,
+        func.unnest(bindparam("payloads", type_=ARRAY(Text))),
+    )
+)
+
+
+def notify(events: list[ChangeEvent]) -> tuple[Select, dict]:
+    """
+    The statement publishing events to the change feed, and its parameters.
+    Run in the transaction of the changes, the events are delivered once it
+    commits and never if it rolls back.
+    """
+    return notify_statement, {
+        "payloads": [event.model_dump_json() for event in events]
+    }
+
+
+class Subscription:
+    """
+    The events of the change feed matching a table and user filter, buffered
+    up to max_size. A subscriber that falls further behind is closed with
+    OVERFLOW rather than slowing down the feed or buffering without bound:
+    it missed events, so it should reload what it follows and subscribe
+    again.
+    """
+
+    def __init__(
+        self,
+        table: ChangeTable | None,
+        user_id: UUID | None,
+        max_size: int = CHANGE_FEED_QUEUE_SIZE,
+    ) -> None:
+        self.table = table
+        self.user_id = user_id
+        self.queue: asyncio.Queue[ChangeEvent | str] = asyncio.Queue(max_size)
+        self.closed = False
+
+    def publish(self, event: ChangeEvent) -> None:
+        if self.closed or self.table not in (None, event.table):
+            return
+
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.close(OVERFLOW)
+
+    def close(self, reason: str) -> None:
+        """
+        Drop the buffered events and end the subscription with reason.
+        """
+        if self.closed:
+            return
+
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(reason)
+
+    async def get(self) -> ChangeEvent | str:
+        """
+        The next event, or the reason the subscription was closed.
+        """
+        return await self.queue.get()
+
+
+class ChangeFeed:
+    """
+    Fan the row changes published on a NOTIFY channel out to the
+    subscriptions of the worker process.
+
+    The worker listens on a single dedicated connection, outside the pool
+    and the database concurrency limiter, whatever its number of
+    subscribers. Subscriptions are indexed by the user they follow, so an
+    event only visits the subscriptions that may want it.
+
+    Start it on startup and stop it on shutdown. When the listener
+    connection is lost, events may be missed until it reconnects, so the
+    subscriptions are closed with RECONNECT.
+    """
+
+    def __init__(
+        self,
+        channel: str = CHANGE_FEED_CHANNEL,
+        reconnect_interval: float = CHANGE_FEED_RECONNECT_INTERVAL,
+    ) -> None:
+        self.channel = channel
+        self.reconnect_interval = reconnect_interval
+        self.subscriptions: defaultdict[UUID | None, set[Subscription]] = (
+            defaultdict(set)
+        )
+        self.worker: asyncio.Task | None = None
+        self.closing = False
+
+    def start(self) -> None:
+        self.closing = False
+        self.worker = asyncio.create_task(self._run())
+
+    def close(self) -> None:
+        """
+        Close every subscription with SHUTDOWN, and those made from now on.
+        """
+        self.closing = True
+        self._close_all(SHUTDOWN)
+
+    async def stop(self) -> None:
+        """
+        Close every subscription and the listener connection.
+        """
+        self.close()
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+
+    def subscribe(
+        self, table: ChangeTable | None = None, user_id: UUID | None = None
+    ) -> Subscription:
+        """
+        Subscribe to the changes of table, or of all tables, owned by
+        user_id, or by any user. Unsubscribe once done.
+        """
+        subscription = Subscription(table, user_id)
+        if self.closing:
+            subscription.close(SHUTDOWN)
+        else:
+            self.subscriptions[user_id].add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self.subscriptions.get(subscription.user_id)
+        if subscriptions is None:
+            return
+
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self.subscriptions[subscription.user_id]
+
+    def publish(self, event: ChangeEvent) -> None:
+        for user_id in {None, event.user_id}:
+            for subscription in list(self.subscriptions.get(user_id, ())):
+                subscription.publish(event)
+
+    def _notified(
+        self,
+        connection: asyncpg.Connection,
+        pid: int,
+        channel: str,
+        payload: str,
+    ) -> None:
+        try:
+            event = ChangeEvent.model_validate_json(payload)
+        except ValidationError:
+            logger.warning(f"Invalid change feed event: {payload}")
+            return
+
+        self.publish(event)
+
+    def _close_all(self, reason: str) -> None:
+        subscriptions, self.subscriptions = self.subscriptions, defaultdict(set)
+        for user_subscriptions in subscriptions.values():
+            for subscription in user_subscriptions:
+                subscription.close(reason)
+
+    async def _listen(self) -> None:
+        """
+        Listen on the channel until the connection is lost.
+        """
+        lost = asyncio.Event()
+        connection = await asyncpg.connect(f"postgresql://{DB_URL}")
+        try:
+            connection.add_termination_listener(lambda _: lost.set())
+            await connection.add_listener(self.channel, self._notified)
+            await lost.wait()
+        finally:
+            await connection.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+                logger.warning("Change feed listener lost its connection")
+            except (
+                OSError,
+                asyncpg.PostgresError,
+                asyncpg.InterfaceError,
+            ) as exp:
+                logger.warning(f"Change feed listener failed: {exp!r}")
+
+            self._close_all(RECONNECT)
+            await asyncio.sleep(self.reconnect_interval)
+
+
+change_feed = ChangeFeed()
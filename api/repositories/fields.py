@@ -0,0 +1,27 @@
+from sqlalchemy import Table
+
+
+class InvalidFieldsError(ValueError):
+    pass
+
+
+def parse_fields(table: Table, fields: str | None) -> tuple[str, ...] | None:
+    """
+    Parse a comma-separated selection of table columns, e.g. "name,plan",
+    into their names in table order, so equal selections share one prebuilt
+    statement. The primary key is always selected, as pages need it for their
+    cursor. None selects all columns.
+    """
+    if fields is None:
+        return None
+
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names - set(table.columns.keys())
+    if unknown:
+        raise InvalidFieldsError(
+            f"Invalid fields: {', '.join(sorted(unknown))}"
+        )
+
+    return tuple(
+        name for name in table.columns.keys() if name in names or name == "id"
+    )
@@ -0,0 +1,168 @@
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.configuration import DB_LOG
+from api.configuration import DB_N_PLUS_ONE_THRESHOLD
+from api.logger import logger
+from api.metrics import DB_POOL_TIMEOUTS
+from api.metrics import DB_POOL_WAIT
+from api.repositories.limiter import db_limiter
+
+
+@dataclass
+class RequestStats:
+    """
+    Database usage of a single request, durations in seconds.
+    """
+
+    query_count: int = 0
+    query_time: float = 0.0
+    rows: int = 0
+    limiter_wait: float = 0.0
+    pool_wait: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    # Queries of reads shared with concurrent requests, see SingleFlight
+    coalesced_count: int = 0
+    coalesced_time: float = 0.0
+
+    def add_coalesced(self, shared: "RequestStats") -> None:
+        """
+        Record the queries of a read shared with concurrent requests, run
+        on a database context of its own. Its statements count towards N+1
+        detection as if the request had executed them.
+        """
+        self.coalesced_count += shared.query_count
+        self.coalesced_time += shared.query_time
+        self.rows += shared.rows
+        self.statements.update(shared.statements)
+
+    def repeated_statements(self) -> dict[str, int]:
+        """
+        Statements executed at least DB_N_PLUS_ONE_THRESHOLD times, the
+        signature of an N+1 query pattern.
+        """
+        return {
+            statement: count
+            for statement, count in self.statements.items()
+            if count >= DB_N_PLUS_ONE_THRESHOLD
+        }
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            [
+                f"db;dur={self.query_time * 1000:.2f};"
+                f'desc="{self.query_count} queries"',
+                f"db-limiter;dur={self.limiter_wait * 1000:.2f}",
+                f"db-pool;dur={self.pool_wait * 1000:.2f}",
+                f"db-coalesced;dur={self.coalesced_time * 1000:.2f};"
+                f'desc="{self.coalesced_count} queries"',
+            ]
+        )
+
+    def log_fields(self) -> dict[str, Any]:
+        return {
+            "db_queries": self.query_count,
+            "db_rows": self.rows,
+            "db_time_ms": round(self.query_time * 1000, 2),
+            "db_limiter_wait_ms": round(self.limiter_wait * 1000, 2),
+            "db_pool_wait_ms": round(self.pool_wait * 1000, 2),
+            "db_coalesced_queries": self.coalesced_count,
+            "db_coalesced_time_ms": round(self.coalesced_time * 1000, 2),
+        }
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    if DB_LOG:
+        logger.info(statement)
+
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    elapsed = time.perf_counter() - context._query_start
+    db_limiter.observe(elapsed)
+
+    stats = request_stats.get()
+    if stats is None:
+        return
+
+    stats.query_count += 1
+    stats.query_time += elapsed
+    stats.rows += max(cursor.rowcount, 0)
+    stats.statements[statement] += 1
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Record the statements executed by the engine into the request stats of
+    the current context.
+    """
+    event.listen(
+        engine.sync_engine, "before_cursor_execute", _before_cursor_execute
+    )
+    event.listen(
+        engine.sync_engine, "after_cursor_execute", _after_cursor_execute
+    )
+
+
+async def checkout_connection(session: AsyncSession) -> None:
+    """
+    Check out the connection of the session ahead of its first statement,
+    recording the time spent waiting on the pool.
+    """
+    if session.in_transaction():
+        return
+
+    start = time.perf_counter()
+    try:
+        await session.connection()
+    except TimeoutError:
+        DB_POOL_TIMEOUTS.inc()
+        raise
+
+    wait = time.perf_counter() - start
+    DB_POOL_WAIT.observe(wait)
+
+    stats = request_stats.get()
+    if stats is not None:
+        stats.pool_wait += wait
+
+
+def record_limiter_wait(seconds: float) -> None:
+    stats = request_stats.get()
+    if stats is not None:
+        stats.limiter_wait += seconds
+
+
+def log_request_stats(method: str, path: str, stats: RequestStats) -> None:
+    fields = stats.log_fields()
+    logger.info(
+        f"{method} {path} "
+        + " ".join(f"{key}={value}" for key, value in fields.items()),
+        extra=fields,
+    )
+
+    for statement, count in stats.repeated_statements().items():
+        logger.warning(
+            f"{method} {path} executed the same statement {count} times, "
+            f"possible N+1 query: {statement}",
+            extra={"db_statement": statement, "db_statement_count": count},
+        )
@@ -0,0 +1,179 @@
+import asyncio
+import time
+from collections import deque
+
+from api.configuration import DB_CONCURRENCY_LIMIT
+from api.configuration import DB_CONCURRENCY_MAX
+from api.configuration import DB_CONCURRENCY_MIN
+from api.configuration import DB_LIMITER_MODE
+from api.configuration import DB_LIMITER_QUEUE_SIZE
+from api.configuration import DB_LIMITER_QUEUE_TIMEOUT
+from api.configuration import DB_LIMITER_TARGET_LATENCY
+from api.metrics import DB_LIMITER_IN_USE
+from api.metrics import DB_LIMITER_LIMIT
+from api.metrics import DB_LIMITER_REJECTED
+from api.metrics import DB_LIMITER_WAITING
+
+
+class LimiterOverloadedError(Exception):
+    pass
+
+
+class ConcurrencyLimiter:
+    """
+    Caps the number of sessions querying the database at once.
+
+    Up to queue_size callers wait in FIFO order for a permit, for at most
+    queue_timeout seconds. Callers beyond that are rejected right away with
+    LimiterOverloadedError, so overload sheds requests fast instead of
+    piling them up until the pool times out.
+    """
+
+    def __init__(
+        self, limit: int, queue_size: int, queue_timeout: float
+    ) -> None:
+        self._limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.in_use = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._update_metrics()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if self.in_use < self.limit and not self._waiters:
+            self.in_use += 1
+            self._update_metrics()
+            return
+
+        if len(self._waiters) >= self.queue_size:
+            DB_LIMITER_REJECTED.inc()
+            raise LimiterOverloadedError("Database concurrency queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._update_metrics()
+        try:
+            await asyncio.wait([future], timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if future.done():
+                # The permit was handed over as the waiter got cancelled
+                self.release()
+            else:
+                self._discard(future)
+            raise
+
+        if not future.done():
+            self._discard(future)
+            DB_LIMITER_REJECTED.inc()
+            raise LimiterOverloadedError(
+                "Timed out waiting for database concurrency"
+            )
+
+    def release(self) -> None:
+        self.in_use -= 1
+        self._wake()
+
+    def observe(self, latency: float) -> None:
+        """
+        Feed the latency of a completed query, in seconds.
+        """
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_use < self.limit:
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_use += 1
+                future.set_result(None)
+
+        self._update_metrics()
+
+    def _discard(self, future: asyncio.Future) -> None:
+        future.cancel()
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+        self._update_metrics()
+
+    def _update_metrics(self) -> None:
+        DB_LIMITER_LIMIT.set(self.limit)
+        DB_LIMITER_IN_USE.set(self.in_use)
+        DB_LIMITER_WAITING.set(len(self._waiters))
+
+
+class AIMDLimiter(ConcurrencyLimiter):
+    """
+    Adapts the limit to the observed query latency: additive increase while
+    queries complete within target_latency and the limit is in use,
+    multiplicative decrease, at most once per decrease_interval, when they
+    do not.
+    """
+
+    decrease_interval = 1.0
+
+    def __init__(
+        self,
+        limit: int,
+        queue_size: int,
+        queue_timeout: float,
+        min_limit: int,
+        max_limit: int,
+        target_latency: float,
+        backoff: float = 0.9,
+    ) -> None:
+        self._estimate = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self._last_decrease = 0.0
+        super().__init__(limit, queue_size, queue_timeout)
+
+    @property
+    def limit(self) -> int:
+        return int(self._estimate)
+
+    def observe(self, latency: float) -> None:
+        if latency > self.target_latency:
+            now = time.monotonic()
+            if now - self._last_decrease < self.decrease_interval:
+                return
+
+            self._last_decrease = now
+            self._estimate = max(self._estimate * self.backoff, self.min_limit)
+        elif self.in_use * 2 >= self.limit:
+            self._estimate = min(
+                self._estimate + 1 / self._estimate, self.max_limit
+            )
+
+        self._wake()
+
+
+def limiter_factory() -> ConcurrencyLimiter:
+    if DB_LIMITER_MODE == "aimd":
+        return AIMDLimiter(
+            limit=DB_CONCURRENCY_LIMIT,
+            queue_size=DB_LIMITER_QUEUE_SIZE,
+            queue_timeout=DB_LIMITER_QUEUE_TIMEOUT,
+            min_limit=DB_CONCURRENCY_MIN,
+            max_limit=DB_CONCURRENCY_MAX,
+            target_latency=DB_LIMITER_TARGET_LATENCY,
+        )
+
+    return ConcurrencyLimiter(
+        limit=DB_CONCURRENCY_LIMIT,
+        queue_size=DB_LIMITER_QUEUE_SIZE,
+        queue_timeout=DB_LIMITER_QUEUE_TIMEOUT,
+    )
+
+
+db_limiter = limiter_factory()
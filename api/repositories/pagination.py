@@ -0,0 +1,26 @@
+from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64encode
+from binascii import Error as BinasciiError
+from uuid import UUID
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(id: UUID) -> str:
+    """
+    Encode the last seen primary key into an opaque pagination cursor.
+    """
+    return urlsafe_b64encode(id.bytes).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> UUID:
+    """
+    Decode a cursor produced by encode_cursor back into the primary key it
+    points after.
+    """
+    try:
+        return UUID(bytes=urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (BinasciiError, ValueError) as exp:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from exp
@@ -1,20 +1,33 @@
-from uuid import UUID
+from typing import Any
 
-from models.portfolio import PortfolioModel
-from repositories.base import BaseRepository
+from sqlalchemy import Values
+from sqlalchemy import select
+from sqlalchemy.sql import Select
 
+from api.enums.change_table import ChangeTable
+from api.models.portfolio import PortfolioModel
+from api.models.user import UserModel
+from api.repositories.base import BaseRepository
+from api.repositories.write_behind import WriteBehindQueue
+from api.schemas.portfolio import PortfolioBatchUpdateModel
 
-class PortfolioRepository(BaseRepository):
-    orm_model: PortfolioModel = PortfolioModel
+
+class PortfolioRepository(BaseRepository[PortfolioModel]):
+    orm_model = PortfolioModel
+    filter_fields = ("type", "user_id")
+    change_table = ChangeTable.PORTFOLIOS
+    owner_column = "user_id"
 
     @classmethod
-    async def get(cls, id: UUID) -> PortfolioModel | None:
-        return await (
-            cls.select(cls.orm_model)
-            .where(cls.orm_model.id == id)
-            .one_or_none()
-        )
+    def insert_source(cls, batch: Values) -> Select:
+        users = UserModel.__table__
+        return select(batch).join(users, users.c.id == batch.c.user_id)
 
     @classmethod
-    async def all(cls) -> list[PortfolioModel]:
-        return await cls.select(cls.orm_model).all()
+    def insert_error(cls, row: dict[str, Any]) -> str:
+        return f"User {row['user_id']} not found"
+
+
+portfolio_writes = WriteBehindQueue(
+    PortfolioRepository, PortfolioBatchUpdateModel
+)
@@ -0,0 +1,59 @@
+import time
+from itertools import count
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import InterfaceError
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from api.logger import logger
+
+
+def is_connection_error(exp: BaseException) -> bool:
+    """
+    Whether exp means the database could not be reached, as opposed to an
+    error of the statement itself.
+    """
+    if isinstance(exp, DBAPIError) and exp.connection_invalidated:
+        return True
+
+    return isinstance(
+        exp, (OSError, InterfaceError, OperationalError, TimeoutError)
+    )
+
+
+class ReplicaSet:
+    """
+    Round-robin load balancing over read replica engines. A replica failing
+    to connect is ejected for eject_seconds, during which reads go to the
+    remaining replicas, or to the primary when none is left.
+    """
+
+    def __init__(
+        self, engines: list[AsyncEngine], eject_seconds: float
+    ) -> None:
+        self.engines = engines
+        self.eject_seconds = eject_seconds
+        self._ejected_until = [0.0] * len(engines)
+        self._counter = count()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self) -> AsyncEngine | None:
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            index = next(self._counter) % len(self.engines)
+            if self._ejected_until[index] <= now:
+                return self.engines[index]
+
+        return None
+
+    def eject(self, engine: AsyncEngine) -> None:
+        index = self.engines.index(engine)
+        self._ejected_until[index] = time.monotonic() + self.eject_seconds
+        logger.warning(
+            f"Ejecting read replica {engine.url.host}:{engine.url.port} "
+            f"for {self.eject_seconds}s"
+        )
@@ -0,0 +1,72 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable
+from typing import Callable
+from typing import Hashable
+from typing import TypeVar
+
+from api.configuration import DB_SINGLE_FLIGHT_MAX_KEYS
+from api.metrics import DB_COALESCED_READS
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Call:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls: while the call for a key is in
+    flight, later calls for the same key wait for its result instead of
+    running their own.
+
+    The call runs in a task of its own, so one caller being cancelled does
+    not cancel it for the others; it is cancelled once all its callers are.
+    At most max_keys calls are in flight, calls beyond that run alone.
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self.calls: dict[Hashable, _Call] = {}
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self.calls.get(key) is call:
+            del self.calls[key]
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Return the result of func, or of the call in flight for key.
+
+        key: Hashable, Identifies calls with the same result.
+        func: Callable[[], Awaitable[T]], Makes the call.
+        """
+        call = self.calls.get(key)
+        if call is not None:
+            DB_COALESCED_READS.inc()
+        elif len(self.calls) >= self.max_keys:
+            return await func()
+        else:
+            call = self.calls[key] = _Call(asyncio.ensure_future(func()))
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self._forget(key, call)
+
+
+def single_flight_factory() -> SingleFlight | None:
+    if not DB_SINGLE_FLIGHT_MAX_KEYS:
+        return None
+
+    return SingleFlight(DB_SINGLE_FLIGHT_MAX_KEYS)
+
+
+db_single_flight = single_flight_factory()
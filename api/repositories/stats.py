@@ -0,0 +1,117 @@
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import column
+from sqlalchemy import func
+from sqlalchemy import table
+
+from api.enums.portfolio_type import PortfolioType
+from api.enums.stats_dimension import StatsDimension
+from api.enums.subscription_plan import SubscriptionPlan
+from api.models.portfolio import PortfolioModel
+from api.models.stats_counter import StatsCounterModel
+from api.models.user import UserModel
+from api.repositories.base import BaseRepository
+from api.repositories.base import Select
+from api.schemas.stats import StatsModel
+
+pg_class = table(
+    "pg_class", column("oid"), column("relname"), column("reltuples")
+)
+
+
+class StatsRepository(BaseRepository[Any]):
+    """
+    Row counts of users and portfolios, read from the counters the table
+    triggers maintain, so they cost the same whatever the table sizes.
+    """
+
+    orm_model = StatsCounterModel
+    cache = None
+
+    @classmethod
+    def hot_statements(cls) -> list[tuple[Select, dict[str, Any]]]:
+        return [(cls.counters_statement(), {}), (cls.estimates_statement(), {})]
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def counters_statement(cls) -> Select:
+        counters = cls.orm_model.__table__
+        return cls.select(
+            counters.c.dimension, counters.c.key, counters.c.count
+        ).where(counters.c.count != 0)
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def estimates_statement(cls) -> Select:
+        tables = [UserModel.__tablename__, PortfolioModel.__tablename__]
+        return cls.select(pg_class.c.relname, pg_class.c.reltuples).where(
+            pg_class.c.relname.in_(tables),
+            func.pg_table_is_visible(pg_class.c.oid),
+        )
+
+    @classmethod
+    async def stats(cls) -> StatsModel:
+        """
+        The exact counts per plan, per portfolio type, per plan and
+        portfolio type, and the number of users per portfolio count.
+        """
+        counters: defaultdict[StatsDimension, dict[str, int]] = defaultdict(
+            dict
+        )
+        for dimension, key, count in await cls.coalesced(
+            cls.counters_statement(), "rows"
+        ):
+            counters[StatsDimension(dimension)][key] = count
+
+        plans = {
+            plan: counters[StatsDimension.PLAN].get(plan.value, 0)
+            for plan in SubscriptionPlan
+        }
+        types = {
+            type: counters[StatsDimension.TYPE].get(type.value, 0)
+            for type in PortfolioType
+        }
+        plan_types = {
+            plan: {
+                type: counters[StatsDimension.PLAN_TYPE].get(
+                    f"{plan.value}:{type.value}", 0
+                )
+                for type in PortfolioType
+            }
+            for plan in SubscriptionPlan
+        }
+        portfolios_per_user = {
+            int(portfolios): users
+            for portfolios, users in counters[
+                StatsDimension.PORTFOLIOS_PER_USER
+            ].items()
+        }
+
+        return StatsModel(
+            users=sum(plans.values()),
+            portfolios=sum(types.values()),
+            plans=plans,
+            types=types,
+            plan_types=plan_types,
+            portfolios_per_user=dict(sorted(portfolios_per_user.items())),
+        )
+
+    @classmethod
+    async def estimates(cls) -> StatsModel:
+        """
+        The total counts estimated by the planner, as of the last VACUUM or
+        ANALYZE of each table, without reading the counters.
+        """
+        estimates = {
+            name: max(int(reltuples), 0)
+            for name, reltuples in await cls.coalesced(
+                cls.estimates_statement(), "rows"
+            )
+        }
+        return StatsModel(
+            users=estimates.get(UserModel.__tablename__, 0),
+            portfolios=estimates.get(PortfolioModel.__tablename__, 0),
+            approximate=True,
+        )
@@ -1,36 +1,123 @@
+from functools import lru_cache
+from itertools import chain
+from typing import Any
 from uuid import UUID
+from uuid import uuid4
 
-from sqlalchemy.orm import selectinload
+from sqlalchemy import ColumnElement
+from sqlalchemy import Table
+from sqlalchemy import Text
+from sqlalchemy import bindparam
+from sqlalchemy import cast
+from sqlalchemy import func
+from sqlalchemy import literal_column
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlmodel import col
 
-from models.portfolio import PortfolioModel
-from models.user import UserModel
-from repositories.base import BaseRepository
+from api.configuration import PAGE_SIZE_DEFAULT
+from api.enums.change_table import ChangeTable
+from api.models.portfolio import PortfolioModel
+from api.models.user import UserModel
+from api.repositories.base import BaseRepository
+from api.repositories.base import Select
+from api.repositories.pagination import encode_cursor
 
 
-class UserRepository(BaseRepository):
-    orm_model: UserModel = UserModel
+def json_object(
+    table: Table, names: tuple[str, ...] | None = None, **extra: ColumnElement
+) -> ColumnElement:
+    """
+    A json_build_object of the table columns in names, all when None, plus
+    the extra fields.
+    """
+    fields = {
+        column.name: column
+        for column in table.columns
+        if names is None or column.name in names
+    } | extra
+    return func.json_build_object(*chain.from_iterable(fields.items()))
+
+
+class UserRepository(BaseRepository[UserModel]):
+    orm_model = UserModel
+    filter_fields = ("plan",)
+    change_table = ChangeTable.USERS
+    owner_column = "id"
 
     @classmethod
-    async def get(cls, id: UUID) -> UserModel | None:
-        return await (
-            cls.select(cls.orm_model)
-            .where(cls.orm_model.id == id)
-            .one_or_none()
-        )
+    def hot_statements(cls) -> list[tuple[Select, dict[str, Any]]]:
+        id = uuid4()
+        return [
+            *super().hot_statements(),
+            (cls.portfolios_statement(), {"id": id}),
+            (cls.portfolios_page_statement((), None), {"limit": 1}),
+            (
+                cls.portfolios_page_statement(("cursor",), None),
+                {"cursor": id, "limit": 1},
+            ),
+        ]
 
     @classmethod
-    async def all(cls) -> list[UserModel]:
-        return await cls.select(cls.orm_model).all()
+    @lru_cache(maxsize=None)
+    def portfolios_statement(cls) -> Select:
+        return cls.select(PortfolioModel).where(
+            col(PortfolioModel.user_id) == bindparam("id")
+        )
 
     @classmethod
     async def get_portfolios(cls, id: UUID) -> list[PortfolioModel]:
-        result = await (
-            cls.select(cls.orm_model)
-            .where(cls.orm_model.id == id)
-            .options(selectinload(UserModel.portfolios))
-            .one_or_none()
+        return await cls.coalesced(cls.portfolios_statement(), "all", id=id)
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def portfolios_page_statement(
+        cls, names: tuple[str, ...], fields: tuple[str, ...] | None
+    ) -> Select:
+        users = cls.orm_model.__table__
+        portfolios = PortfolioModel.__table__
+
+        portfolios_json = (
+            select(
+                func.coalesce(
+                    func.json_agg(
+                        aggregate_order_by(
+                            json_object(portfolios), portfolios.c.id
+                        )
+                    ),
+                    literal_column("'[]'::json"),
+                )
+            )
+            .where(portfolios.c.user_id == users.c.id)
+            .scalar_subquery()
+        )
+        user_json = cast(
+            json_object(users, fields, portfolios=portfolios_json), Text
+        )
+
+        return cls.paginated(cls.select(users.c.id, user_json), names)
+
+    @classmethod
+    async def page_with_portfolios(
+        cls,
+        limit: int = PAGE_SIZE_DEFAULT,
+        cursor: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        **filters: Any,
+    ) -> tuple[list[str], str | None]:
+        """
+        A page of users with their portfolios embedded, as JSON built by
+        Postgres in a single statement, and the cursor of the next page.
+
+        Arguments as for BaseRepository.page_rows, fields selecting the
+        user columns.
+        """
+        names, params = cls.page_params(limit + 1, cursor, **filters)
+        rows = await cls.coalesced(
+            cls.portfolios_page_statement(names, fields), "rows", **params
         )
-        if result is None:
-            return []
+        if len(rows) <= limit:
+            return [row[1] for row in rows], None
 
-        return result.portfolios
+        rows = rows[:limit]
+        return [row[1] for row in rows], encode_cursor(rows[-1][0])
@@ -0,0 +1,84 @@
+import asyncio
+from typing import Type
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.logger import logger
+from api.repositories.base import BaseRepository
+from api.repositories.base import get_engine
+from api.repositories.base import get_replicas
+
+
+class WarmUpError(Exception):
+    """
+    The primary could not be reached on startup.
+    """
+
+
+async def _open_warm_connection(
+    engine: AsyncEngine, repositories: list[Type[BaseRepository]]
+) -> AsyncConnection:
+    connection = await engine.connect()
+    try:
+        async with AsyncSession(bind=connection) as session:
+            for repository in repositories:
+                for statement, params in repository.hot_statements():
+                    await session.execute(statement, params)
+    except BaseException:
+        await connection.close()
+        raise
+
+    return connection
+
+
+async def prefill(
+    engine: AsyncEngine, size: int, repositories: list[Type[BaseRepository]]
+) -> int:
+    """
+    Open size pool connections at once, preparing the hot statements of
+    the repositories on each, then return them all to the pool. Return
+    the number of connections opened.
+    """
+    connections = await asyncio.gather(
+        *[_open_warm_connection(engine, repositories) for _ in range(size)],
+        return_exceptions=True,
+    )
+    opened = 0
+    for connection in connections:
+        if isinstance(connection, BaseException):
+            logger.warning(f"Pool prefill failed: {connection!r}")
+            continue
+
+        await connection.close()
+        opened += 1
+
+    return opened
+
+
+async def warm_up(size: int, repositories: list[Type[BaseRepository]]) -> None:
+    """
+    Prefill the pools of the primary and of every replica, so the first
+    requests after startup find open connections, compiled statements and
+    prepared statements. Raise WarmUpError when no connection to the
+    primary could be opened, so the worker does not report ready without a
+    database; an unreachable replica is only logged, as reads fall back to
+    the others.
+    """
+    primary = get_engine()
+    for pool_engine in [primary, *get_replicas().engines]:
+        opened = await prefill(pool_engine, size, repositories)
+        logger.info(f"Opened {opened} connections to {pool_engine.url.host}")
+        if pool_engine is primary and size and not opened:
+            raise WarmUpError(
+                f"Could not open any connection to {primary.url.host}"
+            )
+
+
+async def dispose() -> None:
+    """
+    Close the pooled connections of the primary and of every replica.
+    """
+    for pool_engine in [get_engine(), *get_replicas().engines]:
+        await pool_engine.dispose()
@@ -0,0 +1,190 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any
+from typing import Type
+from uuid import UUID
+from uuid import uuid4
+
+from pydantic import BaseModel
+
+from api.configuration import BATCH_SIZE_MAX
+from api.configuration import WRITE_BEHIND_FLUSH_INTERVAL
+from api.configuration import WRITE_BEHIND_MAX_OPERATIONS
+from api.configuration import WRITE_BEHIND_MAX_PENDING
+from api.enums.operation_status import OperationStatus
+from api.logger import logger
+from api.repositories.base import BaseRepository
+from api.repositories.base import db_context
+from api.repositories.base import new_db_instance
+from api.schemas.operation import OperationModel
+
+
+class OperationStore:
+    """
+    The operations of the worker process, keeping at most max_size so
+    finished operations do not accumulate. The oldest finished operations
+    are evicted first, pending ones never are: their status must stay
+    available until the update is applied.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.operations: dict[UUID, OperationModel] = {}
+        # Ids of the finished operations, oldest first
+        self.finished: OrderedDict[UUID, None] = OrderedDict()
+
+    def create(self) -> OperationModel | None:
+        """
+        A new pending operation, or None when max_size operations are
+        pending.
+        """
+        if len(self.operations) >= self.max_size:
+            if not self.finished:
+                return None
+            id, _ = self.finished.popitem(last=False)
+            del self.operations[id]
+
+        operation = OperationModel(id=uuid4(), status=OperationStatus.PENDING)
+        self.operations[operation.id] = operation
+        return operation
+
+    def get(self, id: UUID) -> OperationModel | None:
+        return self.operations.get(id)
+
+    def finish(self, id: UUID, detail: str | None = None) -> None:
+        operation = self.operations.get(id)
+        if operation is None:
+            return
+
+        operation.status = (
+            OperationStatus.SUCCEEDED
+            if detail is None
+            else OperationStatus.FAILED
+        )
+        operation.detail = detail
+        self.finished[id] = None
+
+
+operations = OperationStore(WRITE_BEHIND_MAX_OPERATIONS)
+
+
+class WriteBehindQueue:
+    """
+    Apply row updates in the background. Updates queued for the same row
+    are merged, later fields winning, and flushed together in batched
+    transactions with the update_many of the repository, at most every
+    flush_interval seconds.
+
+    The queue lives in the worker process: start it on startup and drain
+    it on shutdown, so accepted updates are not lost.
+    """
+
+    def __init__(
+        self,
+        repository: Type[BaseRepository],
+        batch_model: Type[BaseModel],
+        flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING,
+    ) -> None:
+        """
+        repository: Type[BaseRepository], The repository of the rows.
+        batch_model: Type[BaseModel], The update model of update_many.
+        flush_interval: float, Seconds updates wait to be merged.
+        max_pending: int, The maximum number of rows with queued updates.
+        """
+        self.repository = repository
+        self.batch_model = batch_model
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending: dict[UUID, tuple[dict[str, Any], list[UUID]]] = {}
+        self.wakeup = asyncio.Event()
+        self.worker: asyncio.Task | None = None
+        self.closing = False
+
+    def start(self) -> None:
+        self.closing = False
+        self.worker = asyncio.create_task(self._run())
+
+    async def drain(self) -> None:
+        """
+        Stop accepting updates and wait until the queued ones are flushed.
+        """
+        if self.worker is None:
+            return
+
+        self.closing = True
+        self.wakeup.set()
+        await self.worker
+        self.worker = None
+
+    def enqueue(
+        self, id: UUID, update_data: BaseModel
+    ) -> OperationModel | None:
+        """
+        Queue an update of row id and return its operation, or None when
+        the queue is not running or full, or when too many operations are
+        pending, for the caller to apply the update itself.
+
+        id: UUID, The primary key of the row.
+        update_data: BaseModel, The update model; None fields are ignored.
+        """
+        if self.worker is None or self.closing:
+            return None
+
+        entry = self.pending.get(id)
+        if entry is None and len(self.pending) >= self.max_pending:
+            return None
+
+        operation = operations.create()
+        if operation is None:
+            return None
+
+        if entry is None:
+            entry = self.pending[id] = ({}, [])
+
+        data, operation_ids = entry
+        data.update(update_data.model_dump(exclude_none=True))
+        operation_ids.append(operation.id)
+        self.wakeup.set()
+
+        return operation
+
+    async def _run(self) -> None:
+        while not self.closing or self.pending:
+            await self.wakeup.wait()
+            if not self.closing:
+                await asyncio.sleep(self.flush_interval)
+
+            self.wakeup.clear()
+            pending, self.pending = self.pending, {}
+            ids = list(pending)
+            for start in range(0, len(ids), BATCH_SIZE_MAX):
+                await self._flush(
+                    {
+                        id: pending[id]
+                        for id in ids[start : start + BATCH_SIZE_MAX]
+                    }
+                )
+
+    async def _flush(
+        self, pending: dict[UUID, tuple[dict[str, Any], list[UUID]]]
+    ) -> None:
+        items = [
+            self.batch_model(id=id, **data) for id, (data, _) in pending.items()
+        ]
+        entries = list(pending.values())
+        try:
+            async with new_db_instance() as db:
+                db_context.set(db)
+                result = await self.repository.update_many(items)
+        except Exception as exp:
+            logger.exception(f"Write-behind flush of {len(items)} rows failed")
+            for _, operation_ids in entries:
+                for id in operation_ids:
+                    operations.finish(id, f"Write failed: {type(exp).__name__}")
+            return
+
+        errors = {error.index: error.detail for error in result.errors}
+        for index, (_, operation_ids) in enumerate(entries):
+            for id in operation_ids:
+                operations.finish(id, errors.get(index))
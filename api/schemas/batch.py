@@ -0,0 +1,41 @@
+from typing import Generic
+from typing import Protocol
+from typing import TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class Identified(Protocol):
+    id: UUID
+
+
+T = TypeVar("T")
+IdentifiedT = TypeVar("IdentifiedT", bound=Identified)
+
+
+def unique_ids(items: list[IdentifiedT]) -> list[IdentifiedT]:
+    """
+    Validate that the items of a batch have distinct ids, as which of two
+    writes of the same row wins would be arbitrary.
+    """
+    indexes: dict[UUID, int] = {}
+    for index, item in enumerate(items):
+        if item.id in indexes:
+            raise ValueError(
+                f"Duplicate id {item.id} at indexes {indexes[item.id]} "
+                f"and {index}"
+            )
+        indexes[item.id] = index
+
+    return items
+
+
+class BatchError(BaseModel):
+    index: int
+    detail: str
+
+
+class BatchResult(BaseModel, Generic[T]):
+    items: list[T]
+    errors: list[BatchError] = []
@@ -0,0 +1,14 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from api.enums.change_operation import ChangeOperation
+from api.enums.change_table import ChangeTable
+
+
+class ChangeEvent(BaseModel):
+    table: ChangeTable
+    operation: ChangeOperation
+    id: UUID
+    user_id: UUID | None = None
+    version: int
@@ -0,0 +1,11 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from api.enums.operation_status import OperationStatus
+
+
+class OperationModel(BaseModel):
+    id: UUID
+    status: OperationStatus
+    detail: str | None = None
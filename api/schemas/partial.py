@@ -0,0 +1,19 @@
+from functools import lru_cache
+from typing import Type
+
+from pydantic import BaseModel
+from pydantic import create_model
+
+
+@lru_cache(maxsize=None)
+def partial_model(
+    model: Type[BaseModel], fields: tuple[str, ...]
+) -> Type[BaseModel]:
+    """
+    A model holding only the given fields of model, with their types, built
+    once per selection, see repositories.fields.parse_fields.
+    """
+    return create_model(
+        f"{model.__name__}[{','.join(fields)}]",
+        **{name: (model.model_fields[name].annotation, ...) for name in fields},
+    )
@@ -1,8 +1,9 @@
+from datetime import datetime
 from uuid import UUID
 
 from pydantic import BaseModel
 
-from enums.portfolio_type import PortfolioType
+from api.enums.portfolio_type import PortfolioType
 
 
 class PortfolioCreateModel(BaseModel):
@@ -10,5 +11,17 @@ class PortfolioCreateModel(BaseModel):
     user_id: UUID
 
 
+class PortfolioReadModel(BaseModel):
+    id: UUID
+    type: PortfolioType
+    user_id: UUID
+    version: int
+    updated_at: datetime
+
+
 class PortfolioUpdateModel(BaseModel):
     type: PortfolioType | None = None
+
+
+class PortfolioBatchUpdateModel(PortfolioUpdateModel):
+    id: UUID
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+from api.enums.portfolio_type import PortfolioType
+from api.enums.subscription_plan import SubscriptionPlan
+
+
+class StatsModel(BaseModel):
+    users: int
+    portfolios: int
+    approximate: bool = False
+    plans: dict[SubscriptionPlan, int] | None = None
+    types: dict[PortfolioType, int] | None = None
+    plan_types: dict[SubscriptionPlan, dict[PortfolioType, int]] | None = None
+    portfolios_per_user: dict[int, int] | None = None
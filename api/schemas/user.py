@@ -1,6 +1,10 @@
+from datetime import datetime
+from uuid import UUID
+
 from pydantic import BaseModel
 
-from enums.subscription_plan import SubscriptionPlan
+from api.enums.subscription_plan import SubscriptionPlan
+from api.schemas.portfolio import PortfolioReadModel
 
 
 class UserCreateModel(BaseModel):
@@ -15,3 +19,18 @@ class UserUpdateModel(BaseModel):
     surname: str | None = None
     email: str | None = None
     plan: SubscriptionPlan | None = None
+
+
+class UserBatchUpdateModel(UserUpdateModel):
+    id: UUID
+
+
+class UserWithPortfoliosModel(BaseModel):
+    id: UUID
+    name: str
+    surname: str
+    email: str
+    plan: SubscriptionPlan
+    version: int
+    updated_at: datetime
+    portfolios: list[PortfolioReadModel]
@@ -0,0 +1,185 @@
+"""
+Seed the database with a large synthetic dataset, e.g.:
+
+    python -m api.seed --users 10_000_000 --portfolios-per-user 0..20
+
+Rows are generated in batches and streamed with COPY in one transaction.
+Plans, portfolio types and portfolio counts follow skewed distributions,
+and the same --seed always generates the same rows.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from itertools import accumulate
+from typing import Iterator
+
+import asyncpg
+
+from api.configuration import DB_URL
+from api.enums.portfolio_type import PortfolioType
+from api.enums.subscription_plan import SubscriptionPlan
+
+# Most users are on the free plan and most portfolios hold stocks
+PLAN_WEIGHTS = {
+    SubscriptionPlan.FREEMIUM: 70,
+    SubscriptionPlan.PREMIUM: 20,
+    SubscriptionPlan.GOLD: 8,
+    SubscriptionPlan.ULTRA: 2,
+}
+TYPE_WEIGHTS = {
+    PortfolioType.STOCK: 60,
+    PortfolioType.ETF: 28,
+    PortfolioType.CRYPTO: 12,
+}
+NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael",
+    "Linda", "William", "Elizabeth", "David", "Barbara", "Richard", "Susan",
+    "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen", "Maria",
+    "Nikos", "Eleni", "Giorgos", "Anna", "Luca", "Sofia", "Hans", "Emma",
+]  # fmt: skip
+SURNAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller",
+    "Davis", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez",
+    "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Papadopoulos", "Rossi", "Muller", "Schmidt", "Dubois", "Novak",
+]  # fmt: skip
+
+USER_COLUMNS = ["id", "name", "surname", "email", "plan"]
+PORTFOLIO_COLUMNS = ["id", "type", "user_id"]
+
+
+def parse_range(value: str) -> range:
+    """
+    Parse an inclusive MIN..MAX range, or a single number.
+    """
+    first, _, last = value.partition("..")
+    try:
+        low, high = int(first), int(last or first)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid range: {value}")
+    if not 0 <= low <= high:
+        raise argparse.ArgumentTypeError(f"Invalid range: {value}")
+
+    return range(low, high + 1)
+
+
+def random_uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+class Generator:
+    """
+    Generate batches of user and portfolio records, deterministic from
+    the seed of rng.
+    """
+
+    def __init__(self, rng: random.Random, portfolios_per_user: range) -> None:
+        self.rng = rng
+        self.plans = list(PLAN_WEIGHTS)
+        self.plan_weights = list(accumulate(PLAN_WEIGHTS.values()))
+        self.types = list(TYPE_WEIGHTS)
+        self.type_weights = list(accumulate(TYPE_WEIGHTS.values()))
+        # Power law: many users hold a few portfolios, a long tail many
+        self.counts = list(portfolios_per_user)
+        self.count_weights = list(
+            accumulate(1 / (count + 1) ** 1.5 for count in self.counts)
+        )
+
+    def users(self, start: int, size: int) -> list[tuple]:
+        rng = self.rng
+        plans = rng.choices(self.plans, cum_weights=self.plan_weights, k=size)
+        users = []
+        for n, plan in zip(range(start, start + size), plans):
+            name, surname = rng.choice(NAMES), rng.choice(SURNAMES)
+            email = f"{name}.{surname}.{n}@example.com".lower()
+            users.append((random_uuid(rng), name, surname, email, plan.value))
+
+        return users
+
+    def portfolios(self, users: list[tuple]) -> list[tuple]:
+        rng = self.rng
+        counts = rng.choices(
+            self.counts, cum_weights=self.count_weights, k=len(users)
+        )
+        portfolios: list[tuple] = []
+        for user, count in zip(users, counts):
+            types = rng.choices(
+                self.types, cum_weights=self.type_weights, k=count
+            )
+            portfolios.extend(
+                (random_uuid(rng), portfolio_type.value, user[0])
+                for portfolio_type in types
+            )
+
+        return portfolios
+
+    def batches(
+        self, users: int, batch_size: int
+    ) -> Iterator[tuple[list[tuple], list[tuple]]]:
+        for start in range(0, users, batch_size):
+            batch = self.users(start, min(batch_size, users - start))
+            yield batch, self.portfolios(batch)
+
+
+async def seed(args: argparse.Namespace) -> None:
+    generator = Generator(random.Random(args.seed), args.portfolios_per_user)
+    connection = await asyncpg.connect(f"postgresql://{DB_URL}")
+    start = time.perf_counter()
+    users = portfolios = 0
+
+    try:
+        async with connection.transaction():
+            if args.truncate:
+                await connection.execute("TRUNCATE portfolios, users")
+
+            for user_batch, portfolio_batch in generator.batches(
+                args.users, args.batch_size
+            ):
+                await connection.copy_records_to_table(
+                    "users", records=user_batch, columns=USER_COLUMNS
+                )
+                await connection.copy_records_to_table(
+                    "portfolios",
+                    records=portfolio_batch,
+                    columns=PORTFOLIO_COLUMNS,
+                )
+                users += len(user_batch)
+                portfolios += len(portfolio_batch)
+                sys.stderr.write(
+                    f"\r{users:,} users, {portfolios:,} portfolios, "
+                    f"{time.perf_counter() - start:.0f}s"
+                )
+
+        await connection.execute("ANALYZE users")
+        await connection.execute("ANALYZE portfolios")
+    finally:
+        await connection.close()
+
+    sys.stderr.write("\n")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m api.seed")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument(
+        "--portfolios-per-user",
+        type=parse_range,
+        default=parse_range("0..20"),
+        help="Inclusive range, e.g. 0..20",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help="Delete all users and portfolios first",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(seed(parse_args()))